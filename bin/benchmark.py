@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the autodidact_tools hot paths (img2bwarray, arr_svd,
+lowrank_reconstruct, swap_s_vecs_top2bottom, normalize_shift and
+text_into_array) over a grid of image sizes, dtypes and ranks. Images are
+synthetic so nothing needs downloading. Each case records its best and
+median time and its peak traced (numpy + python) memory to a json file, and
+compare flags cases that got slower or hungrier between two such files.
+
+    python bin/benchmark.py run -o before.json
+    python bin/benchmark.py run -o after.json --sizes 256 512 --funcs arr_svd
+    python bin/benchmark.py compare before.json after.json --threshold 0.1
+"""
+
+import argparse, datetime, json, os, platform, subprocess, sys, tempfile, time, tracemalloc
+
+import numpy as np
+
+from ouroboros.autodidact_tools import (
+    img2bwarray, arr_svd, lowrank_reconstruct, swap_s_vecs_top2bottom, normalize_shift,
+    text_into_array,
+)
+
+FUNCS = ("img2bwarray", "arr_svd", "lowrank_reconstruct", "swap_s_vecs_top2bottom", "normalize_shift", "text_into_array")
+
+def synthetic_image(size, seed=0):
+    """
+    size x size uint8 test image: smooth gradients and blobs (a decaying
+    spectrum, like a photo) plus some pixel noise
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:1:size * 1j, 0:1:size * 1j]
+    img = 80 * x + 60 * y
+    for cy, cx, width in rng.random((8, 3)):
+        img += 60 * np.exp(-((x - cx)**2 + (y - cy)**2) / (0.02 + 0.1 * width))
+    img += rng.normal(0, 6, img.shape)
+
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+def cases(sizes, dtypes, ranks, workdir, font):
+    """
+    yield (func name, params, setup) where setup() returns the zero argument
+    callable to time, so inputs are built outside the timing
+    """
+    from PIL import Image
+
+    for size in sizes:
+        img = synthetic_image(size)
+
+        path = os.path.join(workdir, f"synthetic_{size}.jpg")
+        Image.fromarray(img).save(path, quality=95)
+        for fraction in (1, .5):
+            yield "img2bwarray", dict(size=size, fraction=fraction), (
+                lambda path=path, fraction=fraction: lambda: img2bwarray(path, fraction)
+            )
+
+        for dtype in dtypes:
+            arr = img.astype(dtype)
+            float_dtype = None if dtype == "uint8" else dtype
+
+            for rank in [None] + list(ranks):
+                def svd_setup(rank=rank, arr=arr, float_dtype=float_dtype):
+                    rsvd_kwargs = {} if rank is None else dict(seed=0)
+                    return lambda: arr_svd(arr, rank, compact=True, dtype=float_dtype, **rsvd_kwargs)
+                yield "arr_svd", dict(size=size, dtype=dtype, rank=rank), svd_setup
+
+            def factors(arr=arr, float_dtype=float_dtype):
+                return arr_svd(arr, compact=True, dtype=float_dtype)
+
+            for rank in [None] + list(ranks):
+                def reconstruct_setup(rank=rank, factors=factors):
+                    end_s_vec = None if rank is None else rank - 1
+                    f = factors()
+                    return lambda: lowrank_reconstruct(f, end_s_vec=end_s_vec, alert=False)
+                yield "lowrank_reconstruct", dict(size=size, dtype=dtype, rank=rank), reconstruct_setup
+
+            for rank in ranks:
+                def swap_setup(rank=rank, factors=factors, arr=arr, float_dtype=float_dtype):
+                    Ua, sa, VHa = factors()
+                    Ub, sb, VHb = arr_svd(arr[::-1], rank, compact=True, dtype=float_dtype, seed=0)
+                    return lambda: swap_s_vecs_top2bottom(Ua, sa, VHa, Ub, sb, VHb, rank, orthogonalize=True)
+                yield "swap_s_vecs_top2bottom", dict(size=size, dtype=dtype, rank=rank), swap_setup
+
+            yield "normalize_shift", dict(size=size, dtype=dtype), (
+                lambda arr=arr: lambda: normalize_shift(arr, 255, 0)
+            )
+
+        yield "text_into_array", dict(size=size), (
+            lambda img=img, size=size: (
+                lambda: text_into_array(img, "You Found Me!", (size // 20, size // 4), size // 8, font=font)
+            )
+        )
+
+def measure(func, repeats):
+    """
+    best and median wall time of func over repeats calls, then one more call
+    under tracemalloc for the peak memory it allocates
+    """
+    times = []
+    for _ in range(repeats):
+        tic = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - tic)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(time_min=min(times), time_median=float(np.median(times)), peak_bytes=peak)
+
+def case_name(func_name, params):
+    return f"{func_name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+def machine_info():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return dict(
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+        commit=commit,
+        python=platform.python_version(),
+        numpy=np.__version__,
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+    )
+
+def run(args):
+    results = []
+    funcs = set(args.funcs)
+    print(f"{'case':<64} {'best (s)':>10} {'median (s)':>11} {'peak (MB)':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for func_name, params, setup in cases(args.sizes, args.dtypes, args.ranks, workdir, args.font):
+            rank = params.get("rank")
+            if func_name not in funcs or (rank is not None and rank > params["size"]):
+                continue
+            name = case_name(func_name, params)
+            try:
+                row = measure(setup(), args.repeats)
+            except OSError as e: # e.g. the font for text_into_array isn't installed
+                print(f"{name:<64} skipped: {e}")
+                continue
+            results.append(dict(name=name, func=func_name, params=params, repeats=args.repeats, **row))
+            print(f"{name:<64} {row['time_min']:>10.4f} {row['time_median']:>11.4f} {row['peak_bytes'] / 2**20:>10.1f}")
+
+    with open(args.output, "w") as fh:
+        json.dump(dict(machine=machine_info(), results=results), fh, indent=1)
+    print(f"wrote {len(results)} results to {args.output}")
+
+def compare(args):
+    """
+    print new / old ratios of best time and peak memory for cases in both
+    files, exit code 1 if any grew by more than the thresholds
+    """
+    with open(args.old) as fh:
+        old = {row["name"]: row for row in json.load(fh)["results"]}
+    with open(args.new) as fh:
+        new = {row["name"]: row for row in json.load(fh)["results"]}
+
+    print(f"{'case':<64} {'time ratio':>10} {'mem ratio':>10}")
+    regressions = []
+    for name in [name for name in new if name in old]:
+        # ignore differences below the timer noise floor
+        time_ratio = max(new[name]["time_min"], args.min_time) / max(old[name]["time_min"], args.min_time)
+        mem_ratio = max(new[name]["peak_bytes"], 1) / max(old[name]["peak_bytes"], 1)
+        flags = []
+        if time_ratio > 1 + args.threshold:
+            flags.append("SLOWER")
+        if mem_ratio > 1 + args.mem_threshold:
+            flags.append("MORE MEMORY")
+        if flags:
+            regressions.append(name)
+        print(f"{name:<64} {time_ratio:>10.2f} {mem_ratio:>10.2f} {' '.join(flags)}")
+
+    only = sorted(set(old) ^ set(new))
+    if only:
+        print(f"{len(only)} cases are only in one file and were skipped")
+    if regressions:
+        print(f"FAIL: {len(regressions)} regressions")
+    sys.exit(1 if regressions else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and save the results")
+    run_parser.add_argument("-o", "--output", default="benchmark.json")
+    run_parser.add_argument("--funcs", nargs="+", default=FUNCS, choices=FUNCS)
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=[256, 512, 1024])
+    run_parser.add_argument("--dtypes", nargs="+", default=["uint8", "float32", "float64"])
+    run_parser.add_argument("--ranks", nargs="+", type=int, default=[10, 100])
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.add_argument("--font", default="Arial.ttf", help="font file for text_into_array")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown")
+    compare_parser.add_argument("--mem-threshold", type=float, default=0.1, help="allowed relative memory growth")
+    compare_parser.add_argument("--min-time", type=float, default=1e-4, help="seconds, faster cases count as this")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
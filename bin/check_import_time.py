@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Import-time regression check for ouroboros. Imports a module in fresh
+interpreters, keeps the best time, and fails (exit code 1) if it is over
+budget or if it dragged in matplotlib or PIL, which should only load on first
+use.
+
+    python bin/check_import_time.py
+    python bin/check_import_time.py --module ouroboros.autodidact_tools --budget 0.3
+"""
+
+import argparse, json, subprocess, sys
+
+LAZY_MODULES = ("matplotlib", "PIL")
+
+TIMER = """
+import json, sys, time
+tic = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - tic
+print(json.dumps([elapsed, [name for name in {lazy!r} if name in sys.modules]]))
+"""
+
+def time_import(module, repeats=5):
+    """
+    best import time of module (seconds) over repeats fresh interpreters, and
+    any LAZY_MODULES it imported
+    """
+    best, loaded = float("inf"), []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(module=module, lazy=LAZY_MODULES)],
+            capture_output=True, text=True, check=True,
+        )
+        elapsed, loaded = json.loads(result.stdout)
+        best = min(best, elapsed)
+
+    return best, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="ouroboros.autodidact_tools")
+    parser.add_argument("--budget", type=float, default=0.3, help="seconds")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    best, loaded = time_import(args.module, args.repeats)
+    print(f"import {args.module}: {best:.3f} s (budget {args.budget:.3f} s)")
+    failed = False
+    if best > args.budget:
+        print("FAIL: over the import time budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: importing {args.module} also imported {', '.join(loaded)}")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,16 @@
+import importlib
+
 __all__ = ["utilitarian_module_name"]
 
-from . import *
+def __getattr__(name):
+    """
+    import submodules on first use (e.g. ouroboros.autodidact_tools) so that
+    importing the package itself doesn't pull in numpy, matplotlib or PIL.
+    """
+    if not name.startswith("_"):
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,66 +1,603 @@
-import os, types, sys
+import os, types, sys, time
+from collections import namedtuple
+from functools import lru_cache
 
 import numpy as np
-import matplotlib.pyplot as plt
-from PIL import Image, ImageDraw, ImageFont
+
+from .tracing import traced
+
+# matplotlib and PIL are imported inside the functions that use them, so
+# importing this module (e.g. in short lived worker processes) stays cheap.
+# The svd cache (svd_cache), batch ingestion (ingest), contrast stretching
+# (contrast) and call tracing (tracing) live in their own modules.
 
 RAW_DATA = os.path.join(os.path.dirname(__file__), os.path.realpath("../notebooks/raw_data"))
 
-def img2bwarray(image_path, resolution_fraction=1):
+class SVDFactors(namedtuple("SVDFactors", ["U", "s", "VH"])):
+    """
+    compact svd factors. Singular values are kept as a 1D vector s instead of
+    a mostly zero S matrix, so U * s @ VH (column scaling) rebuilds the array.
+
+    Unpacks like the (U, S, VH) tuple from arr_svd and is accepted anywhere
+    in this module an S matrix is. S gives the dense matrix if you need it.
+    """
+    __slots__ = ()
+
+    @property
+    def S(self):
+        """
+        dense singular value matrix, shaped like arr_svd's S. Stacked factors
+        (see stacked_svd) give a stack of them.
+        """
+        S = np.zeros((*self.s.shape[:-1], self.U.shape[-1], self.VH.shape[-2]), dtype=self.s.dtype)
+        diag = np.arange(self.s.shape[-1])
+        S[..., diag, diag] = self.s
+        return S
+
+def _s_vector(S):
+    """
+    1D singular values from a vector, a dense S matrix or SVDFactors
+    """
+    if isinstance(S, SVDFactors):
+        return S.s
+    S = np.asarray(S)
+    return S if S.ndim == 1 else np.diag(S)
+
+def unpack_factors(U, S, VH):
+    """
+    allow (U, S, VH) or a single SVDFactors/tuple passed as U. S may be dense.
+    Stacked factors (see stacked_svd) must be compact.
+    """
+    if S is None and VH is None:
+        U, S, VH = U
+    if np.ndim(S) == np.ndim(U) - 1:
+        return U, np.asarray(S), VH
+    return U, _s_vector(S), VH
+
+@traced
+def img2bwarray(image_path, resolution_fraction=1, fast=True):
     """
     Takes an image and returns a black and white image in the form of 
     a numpy array.
+
+    With fast=True the image is shrunk while decoding where possible: JPEGs
+    are decoded straight to grey at 1/2, 1/4 or 1/8 scale (Pillow draft mode),
+    integer reductions (resolution_fraction of 1/2, 1/3, ...) finish with a
+    box reduce() and other fractions resize with Pillow's reduce() pre-step.
+    fast=False decodes at full size and resizes with LANCZOS. Output dims are
+    the same either way, see img2bwarray_report for timings.
     """
 
+    from PIL import Image
+
     assert (0 < resolution_fraction) and (resolution_fraction <= 1), "resolution fraction must be (0,1]"
 
-    bw_img = Image.open(image_path).convert("L")  # open convert to grey
+    bw_img = Image.open(image_path)
+    full_dims = bw_img.size
+
+    final_img_dims = [int(dim * resolution_fraction) for dim in full_dims]
 
-    final_img_dims = [int(dim * resolution_fraction) for dim in bw_img.size]
+    if not fast or resolution_fraction == 1:
+        bw_img = bw_img.convert("L")  # open convert to grey
+        return np.asarray(bw_img.resize(final_img_dims, Image.LANCZOS))
+
+    factor = round(1 / resolution_fraction)
+    if abs(1 / resolution_fraction - factor) < 1e-6:
+        # decode at the largest jpeg scale that divides the reduction factor
+        draft_scale = min(factor & -factor, 8)
+        bw_img.draft("L", [dim // draft_scale for dim in full_dims])
+        bw_img = bw_img.convert("L")
+        drafted = round(full_dims[0] / bw_img.size[0])
+        if factor % drafted == 0:
+            bw_mat = np.asarray(bw_img.reduce(factor // drafted))
+            return bw_mat[:final_img_dims[1], :final_img_dims[0]]
+    else:
+        bw_img.draft("L", final_img_dims)
+        bw_img = bw_img.convert("L")
 
-    bw_mat = np.asarray(bw_img.resize(final_img_dims, Image.ANTIALIAS))
+    bw_mat = np.asarray(bw_img.resize(final_img_dims, Image.LANCZOS, reducing_gap=3.0))
 
     return bw_mat
 
-def text_into_array(arr, text_str, loc_tuple, fontsize, font_fill = 255):
+@traced
+def block_mean_downsample(arr, factor):
+    """
+    shrink the first two dims of arr by an integer factor, averaging each
+    factor x factor block. Trailing rows/cols that don't fill a block are
+    dropped. Integer arrays are summed in integers and rounded back to their
+    dtype, floats are averaged in their own dtype.
+    """
+    assert int(factor) == factor and factor >= 1, "factor must be a positive integer"
+    factor = int(factor)
+    rows, cols = arr.shape[0] // factor, arr.shape[1] // factor
+
+    if np.issubdtype(arr.dtype, np.integer):
+        small_uint = np.issubdtype(arr.dtype, np.unsignedinteger) and arr.dtype.itemsize <= 2
+        acc_dtype = np.uint32 if small_uint else np.int64
+    else:
+        acc_dtype = arr.dtype
+
+    # summing factor**2 strided views is much faster than .sum over small axes
+    block_sum = np.zeros((rows, cols, *arr.shape[2:]), dtype=acc_dtype)
+    for row_offset in range(factor):
+        for col_offset in range(factor):
+            block_sum += arr[row_offset:rows * factor:factor, col_offset:cols * factor:factor]
+
+    if np.issubdtype(arr.dtype, np.integer):
+        return ((block_sum + factor**2 // 2) // factor**2).astype(arr.dtype)
+
+    block_sum /= factor**2
+    return block_sum
+
+def img2bwarray_report(image_path, resolution_fractions=(.5, .4, .25, .125), repeats=3):
+    """
+    time img2bwarray's fast (decode-time reduction) path and, for integer
+    reductions, a full decode + block_mean_downsample against the full decode
+    + LANCZOS resize path for each resolution fraction. Prints a table and
+    returns a list of dicts, the *_diff columns are mean absolute differences
+    from the resize path in grey levels.
+    """
+    def best_time(func, *args):
+        times = []
+        for _ in range(repeats):
+            tic = time.perf_counter()
+            bw_mat = func(*args)
+            times.append(time.perf_counter() - tic)
+        return min(times), bw_mat
+
+    from PIL import Image
+
+    def decode_block_mean(factor):
+        bw_img = np.asarray(Image.open(image_path).convert("L"))
+        return block_mean_downsample(bw_img, factor)
+
+    def mean_abs_diff(a, b):
+        return np.mean(np.abs(a.astype(np.int16) - b))
+
+    print(
+        f"{'fraction':>8} {'resize (s)':>11} {'fast (s)':>9} {'fast_diff':>10} "
+        f"{'block_mean (s)':>15} {'block_mean_diff':>16}"
+    )
+    report = []
+    for fraction in resolution_fractions:
+        slow_time, slow_mat = best_time(img2bwarray, image_path, fraction, False)
+        fast_time, fast_mat = best_time(img2bwarray, image_path, fraction, True)
+        row = dict(
+            resolution_fraction=fraction,
+            resize_time=slow_time,
+            fast_time=fast_time,
+            fast_diff=mean_abs_diff(slow_mat, fast_mat),
+            block_mean_time=np.nan,
+            block_mean_diff=np.nan,
+        )
+        factor = round(1 / fraction)
+        if abs(1 / fraction - factor) < 1e-6:
+            row["block_mean_time"], bm_mat = best_time(decode_block_mean, factor)
+            row["block_mean_diff"] = mean_abs_diff(slow_mat, bm_mat[:slow_mat.shape[0], :slow_mat.shape[1]])
+        report.append(row)
+        print(
+            f"{fraction:>8.3f} {slow_time:>11.4f} {fast_time:>9.4f} {row['fast_diff']:>10.2f} "
+            f"{row['block_mean_time']:>15.4f} {row['block_mean_diff']:>16.2f}"
+        )
+
+    return report
+
+@traced
+def text_into_array(arr, text_str, loc_tuple, fontsize, font_fill = 255, font="Arial.ttf"):
+    """
+    write text_str into a uint8 copy of arr with its top left corner at
+    loc_tuple (x, y). See texts_into_array to write many strings in place.
+    """
 
     #TODO: normalize array for pil 0-255
-    my_img = Image.fromarray(np.uint8(arr), "L")
+    my_arr = np.array(arr, dtype=np.uint8)
+
+    #TODO: reverse normalization (See above TODO)
+    return texts_into_array(my_arr, [(text_str, loc_tuple)], fontsize, font_fill, font)
+
+@traced
+def texts_into_array(buf, labels, fontsize, font_fill=255, font="Arial.ttf"):
+    """
+    write each (text_str, loc_tuple) in labels into the 2D uint8 buf in place
+    and return it. Fonts and rendered text masks are cached (by font path,
+    size and string), so repeated labels are only rasterized once, and each
+    label is blended straight into buf the way PIL's ImageDraw.text would.
+    Locations are rounded to whole pixels, text running off buf is clipped.
+    """
+    assert buf.dtype == np.uint8 and buf.ndim == 2, "buf must be a 2D uint8 array"
+
+    for text_str, loc_tuple in labels:
+        mask, (left, top) = _text_mask(text_str, fontsize, font)
+        x0 = int(round(loc_tuple[0])) + left
+        y0 = int(round(loc_tuple[1])) + top
+
+        # clip the mask to the part landing inside buf
+        rows = slice(max(y0, 0), min(y0 + mask.shape[0], buf.shape[0]))
+        cols = slice(max(x0, 0), min(x0 + mask.shape[1], buf.shape[1]))
+        if rows.start >= rows.stop or cols.start >= cols.stop:
+            continue
+        alpha = mask[rows.start - y0:rows.stop - y0, cols.start - x0:cols.stop - x0].astype(np.int32)
+
+        # same rounding as PIL's BLEND: (bg * (255 - a) + fill * a) / 255
+        blend = buf[rows, cols] * (255 - alpha) + font_fill * alpha + 128
+        buf[rows, cols] = ((blend >> 8) + blend) >> 8
+
+    return buf
+
+@lru_cache(maxsize=64)
+def _load_font(font, fontsize):
+    from PIL import ImageFont
+
     try:
-        fontstr = "Arial.ttf"
-        myfont = ImageFont.truetype(font=fontstr, size=fontsize)
+        return ImageFont.truetype(font=font, size=fontsize)
     except OSError as e:
-        print(f"You likely need to find a new font because your chosen font, {fontstr}, can't be found.")
+        print(f"You likely need to find a new font because your chosen font, {font}, can't be found.")
         raise e
 
-    draw_it = ImageDraw.Draw(my_img)
-    draw_it.text(loc_tuple, text_str, font=myfont, fill = font_fill) 
+@lru_cache(maxsize=4096)
+def _text_mask(text_str, fontsize, font):
+    """
+    read only 0-255 coverage mask of text_str cropped to its bounding box,
+    and the (x, y) offset of that box from the text origin. The offset can
+    be negative for glyphs reaching left of or above the origin. Multi-line
+    strings are measured and drawn like ImageDraw.text does.
+    """
+    from PIL import Image, ImageDraw
 
-    #TODO: reverse normalization (See above TODO)
-    return np.asarray(my_img)
-    
-def arr_svd(arr, **kwargs):
+    myfont = _load_font(font, fontsize)
+    left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox(
+        (0, 0), text_str, font=myfont,
+    )
+
+    mask_img = Image.new("L", (max(right - left, 1), max(bottom - top, 1)))
+    draw_it = ImageDraw.Draw(mask_img)
+    draw_it.text((-left, -top), text_str, font=myfont, fill=255)
+
+    mask = np.asarray(mask_img).copy()
+    mask.setflags(write=False)
+
+    return mask, (left, top)
+
+@traced
+def arr_svd(arr, rank=None, compact=False, block_rows=None, *, dtype=None, refine=0, **kwargs):
     """
     identical to np.linalg.svd except (1) singular values are packaged into
-    the appropriately sized matrix (2) it only handles 2D arr.
+    the appropriately sized matrix (2) a (..., m, n) stack is decomposed frame
+    by frame by stacked_svd (threads and chunk_frames kwargs go along with it)
+    and always comes back compact.
+
+    If compact is True an SVDFactors (U, s, VH) is returned instead, with s a
+    1D vector, and full_matrices defaults to False since the extra columns of
+    U or rows of VH only ever multiply zeros. With compute_uv=False only s is
+    returned.
+
+    If rank is provided only the leading rank singular triplets are computed
+    with randomized_svd (U is m x rank, S is rank x rank, VH is rank x n).
+    In that case the oversample, n_iter, tol and seed kwargs are passed to
+    randomized_svd and the np.linalg.svd kwargs are ignored.
+
+    If block_rows is provided arr is only ever read block_rows rows at a time,
+    so it can be larger than memory (e.g. np.load(path, mmap_mode="r")). With
+    a rank the randomized sketch is computed in row blocks, otherwise the exact
+    decomposition comes from tsqr_svd (pass U_out to write U into a memmap).
+
+    ** default params **
+    dtype -- floating dtype to decompose in. np.float32 halves the memory of
+        arr and the factors and roughly doubles LAPACK speed, plenty for 8 bit
+        images. None keeps float arrays' dtype, anything else becomes float64.
+    refine -- number of float64 refinement steps (see refine_svd) applied to
+        the factors, which then come back reduced and float64. 0 skips it.
 
     see help for numpy.linalg.svd
     """
-    assert len(arr.shape) == 2, f"Provided array has {len(arr.shape)} dims. This function is to make 2D svd more convenient, see np.linalg.svd for N-D svd"
+    if len(arr.shape) > 2:
+        assert block_rows is None, "block_rows only works on 2D arrays"
+        assert not refine, "refine only works on 2D arrays"
+        return stacked_svd(arr, rank, dtype=dtype, **kwargs)
+    assert len(arr.shape) == 2, f"Provided array has {len(arr.shape)} dims, arr_svd needs 2 or more"
 
-    if kwargs.get("compute_uv") is False:
+    compute_uv = kwargs.get("compute_uv", True)
+    if rank is not None or block_rows is not None:
+        if rank is None:
+            result = tsqr_svd(
+                arr, block_rows, compute_uv=compute_uv or bool(refine), U_out=kwargs.get("U_out"), dtype=dtype,
+            )
+            U, s, VH = result if compute_uv or refine else (None, result, None)
+        else:
+            rsvd_kwargs = {
+                key: kwargs[key] for key in ("oversample", "n_iter", "tol", "seed") if key in kwargs
+            }
+            U, s, VH = randomized_svd(arr, rank, block_rows=block_rows, dtype=dtype, **rsvd_kwargs)
+        if refine:
+            U, s, VH = refine_svd(arr, U, s, VH, n_iter=refine, block_rows=block_rows)
+        if compact:
+            return SVDFactors(U, s, VH) if compute_uv else s
+        S = np.diag(s)
+        if not compute_uv:
+            return S
+        return U, S, VH
+
+    arr = np.asarray(arr, dtype=_float_dtype(arr.dtype if dtype is None else dtype))
+    if compact:
+        kwargs.setdefault("full_matrices", False)
+    if refine:
+        # refinement starts from the vectors, even if only s is wanted
+        U, s, VH = refine_svd(arr, *np.linalg.svd(arr, **dict(kwargs, compute_uv=True)), n_iter=refine)
+        if compact:
+            return SVDFactors(U, s, VH) if compute_uv else s
+    elif compact:
+        if compute_uv is False:
+            return np.linalg.svd(arr, **kwargs)
+        return SVDFactors(*np.linalg.svd(arr, **kwargs))
+    elif compute_uv is False:
         s = np.linalg.svd(arr, **kwargs)
-        S = np.zeros((arr.shape[0], arr.shape[1]))
+    else:
+        U, s, VH = np.linalg.svd(arr, **kwargs)
+
+    if compute_uv is False:
+        S = np.zeros((arr.shape[0], arr.shape[1]), dtype=s.dtype)
         S[:s.size, :s.size] = np.diag(s)
         return S
     else:
-        U, s, VH = np.linalg.svd(arr, **kwargs)
-        S = np.zeros((U.shape[1], VH.shape[0]))
+        S = np.zeros((U.shape[1], VH.shape[0]), dtype=s.dtype)
         S[:s.size, :s.size] = np.diag(s)
         return U, S, VH
 
+@traced
+def refine_svd(arr, U, S=None, VH=None, *, n_iter=1, block_rows=None):
+    """
+    float64 refinement of (e.g. float32) factors of a 2D arr, for the few
+    cases that need more than float32 accuracy such as small singular values
+    or reconstructions compared against the original. Returns reduced float64
+    SVDFactors with as many singular triplets as the factors given.
+
+    Each step is a Rayleigh-Ritz projection onto the current left singular
+    subspace (the first on U itself, later ones on arr @ V), so it costs two
+    float64 passes over arr and an svd of a k x n matrix for k singular values.
+    That is cheap for a rank k factorization but as costly as a float64 svd of
+    arr for a full one.
+
+    ** default params **
+    n_iter -- number of refinement steps, each also works as a power
+        iteration on the subspace
+    block_rows -- read arr this many rows at a time (for memmapped arrays)
+    """
+    U, s, VH = unpack_factors(U, S, VH)
+    k = s.size
+    dtype = np.dtype(np.float64)
+
+    Q, _ = np.linalg.qr(np.asarray(U[:, :k], dtype=dtype))
+    for step in range(n_iter):
+        if step:
+            Q, _ = np.linalg.qr(_blocked_matmul(arr, VH.T, block_rows, dtype))
+        Ub, s, VH = np.linalg.svd(_blocked_rmatmul(Q, arr, block_rows, dtype), full_matrices=False)
+
+    return SVDFactors(Q @ Ub, s, VH)
+
+@traced
+def stacked_svd(arr, rank=None, *, threads=None, chunk_frames=None, compute_uv=True, dtype=None, **rsvd_kwargs):
+    """
+    reduced svd of every (m, n) frame of a (..., m, n) stack. Returns
+    SVDFactors with U (..., m, k), s (..., k) and VH (..., k, n), k being
+    min(m, n) or rank, or only s if compute_uv is False.
+
+    Frames are split into chunks of chunk_frames that are decomposed (as one
+    stacked np.linalg.svd call, or randomized_svd per frame when rank is
+    given) on a pool of threads, LAPACK releases the GIL so every core gets
+    used. Other np.linalg.svd kwargs are ignored, factors are always reduced.
+
+    ** default params **
+    threads -- thread pool size, defaults to the number of cores
+    chunk_frames -- frames per task, defaults to ~4 tasks per thread
+    dtype -- floating dtype to decompose in, see arr_svd
+    """
+    *lead, m, n = arr.shape
+    frames = arr.reshape(-1, m, n)
+    n_frames = frames.shape[0]
+    k = min(m, n) if rank is None else rank
+    dtype = _float_dtype(arr.dtype if dtype is None else dtype)
+    rsvd_kwargs = {
+        key: rsvd_kwargs[key] for key in ("oversample", "n_iter", "tol", "seed") if key in rsvd_kwargs
+    }
+
+    from concurrent.futures import ThreadPoolExecutor
+    from .blas_threads import blas_threads, cpu_count
+
+    threads = cpu_count() if threads is None else threads
+    if chunk_frames is None:
+        chunk_frames = max(1, -(-n_frames // (4 * threads)))
+
+    U = np.empty((n_frames, m, k), dtype=dtype) if compute_uv else None
+    s = np.empty((n_frames, k), dtype=dtype)
+    VH = np.empty((n_frames, k, n), dtype=dtype) if compute_uv else None
+
+    def decompose(chunk):
+        if rank is not None:
+            for idx in range(chunk.start, min(chunk.stop, n_frames)):
+                frame_U, s[idx], frame_VH = randomized_svd(frames[idx], rank, dtype=dtype, **rsvd_kwargs)
+                if compute_uv:
+                    U[idx], VH[idx] = frame_U, frame_VH
+        elif compute_uv:
+            U[chunk], s[chunk], VH[chunk] = np.linalg.svd(np.asarray(frames[chunk], dtype=dtype), full_matrices=False)
+        else:
+            s[chunk] = np.linalg.svd(np.asarray(frames[chunk], dtype=dtype), compute_uv=False)
+
+    chunks = [slice(start, start + chunk_frames) for start in range(0, n_frames, chunk_frames)]
+    # limit BLAS for the whole process (threadpoolctl) so each thread's
+    # LAPACK call gets its share of the cores, not all of them
+    with blas_threads(max(1, cpu_count() // threads)), ThreadPoolExecutor(threads) as pool:
+        list(pool.map(decompose, chunks)) # list() re-raises any worker error
+
+    s = s.reshape(*lead, k)
+    if not compute_uv:
+        return s
+    return SVDFactors(U.reshape(*lead, m, k), s, VH.reshape(*lead, k, n))
+
+@traced
+def randomized_svd(arr, rank, *, oversample=10, n_iter=4, tol=None, seed=None, block_rows=None, dtype=None):
+    """
+    leading rank singular triplets of a 2D arr with a randomized range finder
+    (Halko, Martinsson & Tropp 2011). Returns U, s, VH with s as a 1D vector.
+
+    ** default params **
+    oversample -- extra random directions sampled beyond rank, improves accuracy
+    n_iter -- max number of power iterations, helps when singular values decay slowly
+    tol -- stop power iterating once the leading rank singular value estimates
+        change by less than this (relative) amount. None always runs n_iter.
+    seed -- seed (or np.random.Generator) for the random test matrix
+    block_rows -- read arr this many rows at a time (for memmapped arrays).
+        Peak memory is then a block_rows x n block plus the (m + n) x
+        (rank + oversample) sketches. None reads arr all at once.
+    dtype -- floating dtype to compute in, see arr_svd
+    """
+    assert len(arr.shape) == 2, "randomized_svd only handles 2D arrays"
+    n_svals = min(arr.shape)
+    assert 0 < rank <= n_svals, f"rank must be in (0, {n_svals}]"
+
+    n_samples = min(rank + oversample, n_svals)
+    dtype = _float_dtype(arr.dtype if dtype is None else dtype)
+    rng = np.random.default_rng(seed)
 
-def lowrank_reconstruct(U, S, VH, *, end_s_vec = None, start_s_vec = 0, alert=True):
+    omega = rng.standard_normal((arr.shape[1], n_samples)).astype(dtype, copy=False)
+    Q, R = np.linalg.qr(_blocked_matmul(arr, omega, block_rows, dtype))
+
+    # power iterations, re-orthonormalizing each half step for stability
+    s_est = None
+    for _ in range(n_iter):
+        Z, _ = np.linalg.qr(_blocked_rmatmul(Q, arr, block_rows, dtype).T)
+        Q, R = np.linalg.qr(_blocked_matmul(arr, Z, block_rows, dtype))
+        if tol is not None:
+            # singular values of R approach the leading singular values of arr
+            s_new = np.linalg.svd(R, compute_uv=False)[:rank]
+            if s_est is not None and np.max(np.abs(s_new - s_est) / s_new[0]) < tol:
+                break
+            s_est = s_new
+
+    Ub, s, VH = np.linalg.svd(_blocked_rmatmul(Q, arr, block_rows, dtype), full_matrices=False)
+    U = Q @ Ub[:, :rank]
+
+    return U, s[:rank], VH[:rank, :]
+
+@traced
+def tsqr_svd(arr, block_rows, *, compute_uv=True, U_out=None, dtype=None):
+    """
+    exact (reduced) svd of a 2D arr read block_rows rows at a time with a
+    tall-skinny QR: the R factor is updated one row block at a time, the small
+    n x n R is decomposed, and U = arr @ V / s is written back block by block.
+    Returns U, s, VH (s as a 1D vector) or only s if compute_uv is False.
+
+    Peak memory is roughly (2 * block_rows + 2 * n) x n floats on top of U, so
+    this suits tall arrays. For wide ones decompose arr.T or use
+    randomized_svd(block_rows=...). U_out (e.g. np.lib.format.open_memmap)
+    receives U so it never has to fit in memory either.
+
+    U columns for (near) zero singular values are set to zero. dtype is the
+    floating dtype to compute in, see arr_svd.
+    """
+    assert len(arr.shape) == 2, "tsqr_svd only handles 2D arrays"
+    m, n = arr.shape
+    dtype = _float_dtype(arr.dtype if dtype is None else dtype)
+
+    R = np.empty((0, n), dtype=dtype)
+    for rows in row_blocks(m, block_rows):
+        R = np.linalg.qr(np.vstack([R, np.asarray(arr[rows], dtype=dtype)]), mode="r")
+
+    if not compute_uv:
+        return np.linalg.svd(R, compute_uv=False)
+
+    _, s, VH = np.linalg.svd(R, full_matrices=False)
+
+    s_cutoff = s[0] * max(m, n) * np.finfo(dtype).eps if s.size else 0
+    inv_s = np.divide(1, s, out=np.zeros_like(s), where=s > s_cutoff)
+    V_scaled = VH.T * inv_s
+
+    if U_out is None:
+        U_out = np.empty((m, s.size), dtype=dtype)
+    assert U_out.shape == (m, s.size), f"U_out must have shape {(m, s.size)}"
+    for rows in row_blocks(m, block_rows):
+        U_out[rows] = np.asarray(arr[rows], dtype=dtype) @ V_scaled
+
+    return U_out, s, VH
+
+def _float_dtype(dtype):
+    """
+    floating dtype to decompose in: float arrays keep theirs, anything else
+    (e.g. uint8 images) becomes float64 like np.linalg.svd
+    """
+    return np.dtype(dtype) if np.issubdtype(dtype, np.floating) else np.dtype(np.float64)
+
+def row_blocks(n_rows, block_rows):
+    """
+    slices covering n_rows, block_rows at a time (all at once if None)
+    """
+    assert block_rows is None or block_rows > 0, "block_rows must be positive"
+    step = max(n_rows, 1) if block_rows is None else block_rows
+    for start in range(0, n_rows, step):
+        yield slice(start, start + step)
+
+def _blocked_matmul(arr, B, block_rows, dtype):
+    """
+    arr @ B reading arr in row blocks
+    """
+    out = np.empty((arr.shape[0], B.shape[1]), dtype=dtype)
+    for rows in row_blocks(arr.shape[0], block_rows):
+        out[rows] = np.asarray(arr[rows], dtype=dtype) @ B
+    return out
+
+def _blocked_rmatmul(Q, arr, block_rows, dtype):
+    """
+    Q.T @ arr reading arr in row blocks (its transpose gives arr.T @ Q)
+    """
+    out = np.zeros((Q.shape[1], arr.shape[1]), dtype=dtype)
+    for rows in row_blocks(arr.shape[0], block_rows):
+        out += Q[rows].T @ np.asarray(arr[rows], dtype=dtype)
+    return out
+
+def svd_rank_report(arr, ranks, **rsvd_kwargs):
+    """
+    accuracy vs speed of randomized_svd against the exact np.linalg.svd for
+    each rank in ranks. Prints a table and returns a list of dicts.
+
+    frob_err is the relative Frobenius error of the rank-k reconstruction,
+    best_err is the Eckart-Young optimum for that rank (from the exact svd)
+    and sval_err is the max relative error of the leading k singular values.
+    """
+    arr = np.asarray(arr, dtype=_float_dtype(arr.dtype))
+    arr_norm = np.linalg.norm(arr)
+
+    tic = time.perf_counter()
+    s_exact = np.linalg.svd(arr, compute_uv=False)
+    exact_time = time.perf_counter() - tic
+
+    print(f"exact svd {arr.shape}: {exact_time:.3f} s")
+    print(f"{'rank':>6} {'time (s)':>10} {'speedup':>8} {'frob_err':>10} {'best_err':>10} {'sval_err':>10}")
+    report = []
+    for rank in ranks:
+        tic = time.perf_counter()
+        U, s, VH = randomized_svd(arr, rank, **rsvd_kwargs)
+        rand_time = time.perf_counter() - tic
+
+        frob_err = np.linalg.norm(arr - (U * s) @ VH) / arr_norm
+        best_err = np.sqrt(np.sum(s_exact[rank:] ** 2)) / arr_norm
+        sval_err = np.max(np.abs(s - s_exact[:rank]) / s_exact[:rank])
+        row = dict(
+            rank=rank,
+            time=rand_time,
+            speedup=exact_time / rand_time,
+            frob_err=frob_err,
+            best_err=best_err,
+            sval_err=sval_err,
+        )
+        report.append(row)
+        print(
+            f"{rank:>6} {rand_time:>10.3f} {row['speedup']:>8.1f} "
+            f"{frob_err:>10.2e} {best_err:>10.2e} {sval_err:>10.2e}"
+        )
+
+    return report
+
+@traced
+def lowrank_reconstruct(U, S=None, VH=None, *, end_s_vec = None, start_s_vec = 0, alert=True):
     """
 
     U @ S @ VH = M
@@ -86,12 +623,31 @@ def lowrank_reconstruct(U, S, VH, *, end_s_vec = None, start_s_vec = 0, alert=Tr
     uu   
     --2 < 3, n_svals is 2--
 
+    S may be the dense matrix or the 1D vector of singular values, or the
+    factors may be passed together as an SVDFactors in place of U. Either way
+    the product is done by scaling the columns of U, never with a dense S.
+    Stacked factors from stacked_svd reconstruct every frame at once.
+    """
+    U, s, VH = unpack_factors(U, S, VH)
+
+    # Shape of U @ S @ VH determines number of singular values
+    n_svals = min(U.shape[-1], VH.shape[-2])
+    start_s_vec, end_s_vec = resolve_s_slice(n_svals, start_s_vec, end_s_vec, alert)
+
+    # matmul broadcasts, so stacked factors rebuild every frame in one call
+    keep = slice(start_s_vec, end_s_vec + 1)
+    lw_arr = np.matmul(U[..., keep] * s[..., None, keep], VH[..., keep, :])
+
+    return lw_arr
+
+def resolve_s_slice(n_svals, start_s_vec, end_s_vec, alert):
+    """
+    resolve None/negative start_s_vec and end_s_vec (inclusive) against n_svals,
+    see lowrank_reconstruct.
     """
     # by default there shouldn't be an announcment about slice
     slice_warning = False
     slice_str = f"{start_s_vec}:{end_s_vec}"
-    # Shape of U @ S @ VH determines number of singular values
-    n_svals = min(U.shape[1], VH.shape[0])
     
     # prevent indexing into "zeroed out" singular vecotors and values
     if start_s_vec < 0:
@@ -111,79 +667,234 @@ def lowrank_reconstruct(U, S, VH, *, end_s_vec = None, start_s_vec = 0, alert=Tr
             f"from the provided [{slice_str}]."
         )
 
-    lw_arr = np.dot(
-        U[:, start_s_vec:end_s_vec + 1],
-        np.dot(
-            S[start_s_vec:end_s_vec + 1, start_s_vec:end_s_vec + 1],
-            VH[start_s_vec:end_s_vec + 1, :],
-        ),
+    return start_s_vec, end_s_vec
+
+def lowrank_sweep(U, S=None, VH=None, *, end_s_vecs, start_s_vec=0, out=None, alert=True):
+    """
+    yield (end_s_vec, reconstruction) for each end_s_vec in end_s_vecs (in
+    increasing order), matching lowrank_reconstruct(..., start_s_vec=start_s_vec,
+    end_s_vec=end_s_vec).
+
+    Rather than redoing the full product for every rank, each step adds only the
+    newly included singular vectors (a rank-block update) onto a running buffer.
+    The buffer (out, if given, otherwise allocated once) is reused and yielded at
+    every step, so copy it if you want to keep a reconstruction. No arrays are
+    allocated per step.
+
+    see lowrank_reconstruct for the U, S, VH and slicing conventions. Unlike
+    it, only 2D (not stacked) factors are supported.
+    """
+    U, s, VH = unpack_factors(U, S, VH)
+    assert U.ndim == 2 and VH.ndim == 2, "lowrank_sweep only handles 2D factors, not stacks"
+    n_svals = min(U.shape[1], VH.shape[0])
+
+    # resolved up front so an empty end_s_vecs just yields nothing
+    start, _ = resolve_s_slice(n_svals, start_s_vec, None, alert=False)
+    ends = sorted(
+        resolve_s_slice(n_svals, start_s_vec, end_s_vec, alert)[1] for end_s_vec in end_s_vecs
     )
 
-    return lw_arr
+    dtype = np.result_type(U.dtype, s.dtype, VH.dtype)
+    shape = (U.shape[0], VH.shape[1])
+    if out is None:
+        out = np.zeros(shape, dtype=dtype)
+    else:
+        assert out.shape == shape, f"out must have shape {shape}"
+        out[...] = 0
+    scratch = np.empty(shape, dtype=dtype)
+
+    block_sizes = np.diff([start] + [end + 1 for end in ends])
+    us_buf = np.empty((shape[0], max(block_sizes.max(initial=0), 1)), dtype=dtype)
+
+    done = start # singular vectors [start, done) are already in out
+    for end in ends:
+        stop = end + 1
+        if stop > done:
+            n_new = stop - done
+            np.multiply(U[:, done:stop], s[done:stop], out=us_buf[:, :n_new])
+            np.matmul(us_buf[:, :n_new], VH[done:stop, :], out=scratch)
+            out += scratch
+            done = stop
+        yield end, out
     
-def bw_plot(arr, vmin=None, vmax=None):
+@traced
+def bw_plot(arr, vmin=None, vmax=None, save_path=None):
     """
     plot an array with gray cmap.
 
     see matplotlib.pyplot.imshow for vmin, vmax explanation.
+    If save_path is given the figure is drawn headless (Agg) and saved there
+    (format from the extension, e.g. .png or .svg) instead of shown.
+    See ouroboros.render for rendering many arrays in parallel.
     """
 
     print("Minimum Pixel:", arr.min(), "\nMaximum Pixel:", arr.max())
-    fig, ax = plt.subplots()
+    fig, ax = _new_figure(save_path)
     ax.imshow(arr, cmap='gray', vmin=vmin, vmax=vmax)
-    plt.show()
+    _show_or_save(fig, save_path)
 
     return fig, ax
 
-def lr_plot(U, S, VH, end_s_vec = None, start_s_vec=0, vmin=None, vmax=None):
+@traced
+def lr_plot(U, S=None, VH=None, end_s_vec = None, start_s_vec=0, vmin=None, vmax=None, save_path=None):
     """
     combine bw_plot and lowrank_reconstruct for oneline reconstruct and plot.
 
     ** default params **
     see lowrank_reconstruct for end_s_vec and start_s_vec params
     see matplotlib.pyplot.imshow for vmin and vmax params
+    see bw_plot for save_path
     """
     lr = lowrank_reconstruct(U, S, VH, end_s_vec=end_s_vec, start_s_vec=start_s_vec)
-    fig, ax = bw_plot(lr, vmin=vmin, vmax=vmax)
+    fig, ax = bw_plot(lr, vmin=vmin, vmax=vmax, save_path=save_path)
 
     return fig, ax
 
-def s_val_plot(*singmats, dim=None):
+@traced
+def s_val_plot(*singmats, dim=None, save_path=None):
     """
-    make a scree plot of singular values
+    make a scree plot of singular values. singmats may be dense S matrices,
+    1D singular value vectors or SVDFactors. see bw_plot for save_path
     """
-    fig, ax = plt.subplots()
+    fig, ax = _new_figure(save_path)
     for S in singmats:
-        sd = np.diag(S)
+        sd = _s_vector(S)
         if dim is not None:
             ax.plot(sd[:dim])
         else:
             ax.plot(sd)
-    plt.show()
+    _show_or_save(fig, save_path)
 
 
-def s_val_cum_sum(*singmats, dim=None):
+@traced
+def s_val_cum_sum(*singmats, dim=None, save_path=None):
     """
-    cumulative (for each) scree plot
+    cumulative (for each) scree plot, see s_val_plot for singmats and save_path
     """
-    fig, ax = plt.subplots()
+    fig, ax = _new_figure(save_path)
     for this_singmat in singmats:
-        sd = np.diag(this_singmat)
+        sd = _s_vector(this_singmat)
         perc_var = sd / np.sum(sd)
         cum_sum = np.cumsum(perc_var)
         if dim is not None:
             ax.plot(cum_sum[:dim], 'o')
         else:
             ax.plot(cum_sum)
-    plt.show()
+    _show_or_save(fig, save_path)
+
+@traced
+def s_val_error_curves(singmat, *, shape=None, peak=255, frob_norm=None, stacked=False):
+    """
+    error of the best rank r reconstruction for every r = 0..k, straight from
+    the singular values (Eckart-Young), no reconstruction needed. Index r of
+    each curve is for keeping r singular vectors (lowrank_reconstruct with
+    end_s_vec = r - 1). Returns a dict of arrays:
+
+    frob_err -- Frobenius norm of the residual, sqrt(sum of the dropped s**2)
+    rel_frob_err -- frob_err / Frobenius norm of the matrix
+    spectral_err -- 2-norm of the residual, the largest dropped s
+    energy -- fraction of sum(s**2) kept
+    psnr -- 10 * log10(peak**2 / mean squared pixel error), needs shape
+
+    ** default params **
+    singmat -- dense S, 1D s or SVDFactors (see s_val_plot). With stacked=True
+        (or stacked SVDFactors) a (..., k) batch of singular values, every
+        curve then has shape (..., k + 1)
+    shape -- (m, n) of the matrix, only needed for psnr
+    peak -- max possible pixel value for psnr
+    frob_norm -- Frobenius norm of the matrix when s is truncated (e.g. from
+        randomized_svd), so the energy in the missing tail is counted
+    """
+    if isinstance(singmat, SVDFactors) or stacked:
+        s = np.asarray(singmat.s if isinstance(singmat, SVDFactors) else singmat, dtype=np.float64)
+    else:
+        s = np.asarray(_s_vector(singmat), dtype=np.float64)
+
+    s_sq = s**2
+    kept_sq = np.cumsum(s_sq, axis=-1)
+    total_sq = kept_sq[..., -1:] if frob_norm is None else np.asarray(frob_norm, dtype=np.float64)[..., None]**2
+    kept_sq = np.concatenate([np.zeros_like(kept_sq[..., :1]), kept_sq], axis=-1)
+    dropped_sq = np.maximum(total_sq - kept_sq, 0)
+
+    curves = dict(
+        frob_err=np.sqrt(dropped_sq),
+        rel_frob_err=np.sqrt(dropped_sq / total_sq),
+        spectral_err=np.concatenate([s, np.zeros_like(s[..., :1])], axis=-1),
+        energy=kept_sq / total_sq,
+        psnr=None,
+    )
+    if shape is not None:
+        mse = dropped_sq / (shape[-2] * shape[-1])
+        with np.errstate(divide="ignore"):
+            curves["psnr"] = 10 * np.log10(peak**2 / mse)
+
+    return curves
 
-def swap_s_vecs_top2bottom(Ua, Sa, VHa, Ub, Sb, VHb, swp_from):
+@traced
+def select_rank(singmat, *, max_rel_err=None, min_energy=None, min_psnr=None, max_spectral_err=None, **curve_kwargs):
+    """
+    smallest number of singular vectors meeting every target given, from
+    s_val_error_curves (so no reconstruction is done). Returns an int, or an
+    array of ints for a batch. Keep U[:, :r], s[:r], VH[:r] (end_s_vec = r - 1).
+
+    curve_kwargs (shape, peak, frob_norm, stacked) go to s_val_error_curves,
+    min_psnr needs shape.
+    """
+    curves = s_val_error_curves(singmat, **curve_kwargs)
+    meets = np.ones(curves["energy"].shape, dtype=bool)
+    if max_rel_err is not None:
+        meets &= curves["rel_frob_err"] <= max_rel_err
+    if min_energy is not None:
+        meets &= curves["energy"] >= min_energy
+    if max_spectral_err is not None:
+        meets &= curves["spectral_err"] <= max_spectral_err
+    if min_psnr is not None:
+        assert curves["psnr"] is not None, "min_psnr needs the matrix shape"
+        meets &= curves["psnr"] >= min_psnr
+
+    # first rank that meets the targets, all of them if none do
+    rank = np.where(meets.any(axis=-1), np.argmax(meets, axis=-1), meets.shape[-1] - 1)
+
+    return int(rank) if rank.ndim == 0 else rank
+
+def _new_figure(save_path):
+    """
+    pyplot figure to show, or a headless Agg figure (never registered with
+    pyplot, so it can't block or pile up) when saving to save_path
+    """
+    if save_path is None:
+        import matplotlib.pyplot as plt
+        return plt.subplots()
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+def _show_or_save(fig, save_path):
+    if save_path is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        fig.savefig(save_path)
+
+@traced
+def swap_s_vecs_top2bottom(Ua, Sa, VHa, Ub, Sb, VHb, swp_from, orthogonalize=False):
     """
     swap top singular vectors of b, with the bottom singular vectors
     of a. The weights must also be properly relative to one another.
+
+    Sa and Sb may be dense S matrices or 1D singular value vectors. When Sa
+    is a vector the result is returned as SVDFactors.
+
+    With orthogonalize=True the swapped in vectors are replaced by the nearest
+    orthonormal vectors orthogonal to the ones of a that are kept, so the
+    output is already a valid (reduced) svd of its reconstruction and doesn't
+    need to be decomposed again. Output factors are then always reduced.
     """
 
-    if not sys.warnoptions:
+    if not orthogonalize and not sys.warnoptions:
         warn_string = (
                 "Note this performs VERY badly if not at all after reconstruction, it is just "
                 "a quick (and poor) implementation. The singular vectors\n"
@@ -194,18 +905,23 @@ def swap_s_vecs_top2bottom(Ua, Sa, VHa, Ub, Sb, VHb, swp_from):
         warnings.warn(
             warn_string,
             UserWarning,
-            stacklevel = 2,
+            stacklevel = 3, # past the traced wrapper
         )
 
     assert 0 <= swp_from, "swp_from must be positive"
-    assert Ua.shape == Ub.shape, "Left singular vectors (U) dims don't match"
-    assert VHa.shape == VHb.shape, "Right singular vectors (VH) dims don't match"
+    assert Ua.shape[0] == Ub.shape[0], "Left singular vectors (U) dims don't match"
+    assert VHa.shape[1] == VHb.shape[1], "Right singular vectors (VH) dims don't match"
+    assert swp_from <= min(Ub.shape[1], VHb.shape[0]), "b doesn't have swp_from singular vectors"
 
-    # shape of U @ S @ VH determines number of singular values
-    n_svals = min(Ua.shape[0], VHa.shape[1])
+    compact = np.ndim(Sa) == 1
+    Sa_vec = _s_vector(Sa)
+    Sb_vec = _s_vector(Sb)
+
+    # number of singular values, also correct for full_matrices=True factors
+    n_svals = Sa_vec.size
     
     Uout = Ua.copy()
-    Sout = Sa.copy()
+    Sout = Sa_vec.copy()
     VHout = VHa.copy()
 
     # setup slice variables here b/c this is a little confusing
@@ -220,8 +936,6 @@ def swap_s_vecs_top2bottom(Ua, Sa, VHa, Ub, Sb, VHb, swp_from):
     # For proper singular vector balance, replaced vectors must be
     # transferred with ratiometrically matching singular values
     # otherwise the reconstruction of those dims won't "look right"
-    Sa_vec = np.diag(Sa)
-    Sb_vec = np.diag(Sb)
     Sb_swap_vec = Sb_vec.copy()[:top_swap_end] # we care about the top s val ratios of b
     Sb_swap_ratios = Sb_swap_vec / np.sum(Sb_swap_vec)
     
@@ -229,76 +943,184 @@ def swap_s_vecs_top2bottom(Ua, Sa, VHa, Ub, Sb, VHb, swp_from):
     Sa_replace = normalize_shift(Sb_swap_ratios, Sa_vec[bottom_swap_start-1], 0)
 
     # replace bottom of a with top of b
-    Sout[bottom_swap_start:bottom_swap_end, bottom_swap_start:bottom_swap_end] = np.diag(Sa_replace) # replace bottom of a
-    Uout[:, bottom_swap_start:bottom_swap_end] = Ub[:, :top_swap_end] 
-    VHout[bottom_swap_start:bottom_swap_end, :] = VHb[:top_swap_end, :] 
+    Sout[bottom_swap_start:bottom_swap_end] = Sa_replace # replace bottom of a
+    if orthogonalize:
+        Uout, VHout = Uout[:, :n_svals], VHout[:n_svals, :]
+        Uout[:, bottom_swap_start:bottom_swap_end] = _orthonormalize_against(
+            Ub[:, :top_swap_end], Uout[:, :bottom_swap_start],
+        )
+        VHout[bottom_swap_start:bottom_swap_end, :] = _orthonormalize_against(
+            VHb[:top_swap_end, :].T, VHout[:bottom_swap_start, :].T,
+        ).T
+    else:
+        Uout[:, bottom_swap_start:bottom_swap_end] = Ub[:, :top_swap_end] 
+        VHout[bottom_swap_start:bottom_swap_end, :] = VHb[:top_swap_end, :] 
+
+    factors = SVDFactors(Uout, Sout, VHout)
+    if compact:
+        return factors
+
+    return Uout, factors.S, VHout
+
+@traced
+def message_array(shape, text_str, loc_tuple, fontsize, scale=1, seed=None, dtype=np.float64, font="Arial.ttf"):
+    """
+    uniform noise in [0, scale) with text_str written into it as -scale, the
+    secret message for swap_s_vecs_top2bottom. seed is passed to
+    np.random.default_rng, dtype (float32 or float64) is the noise's, font is
+    passed to text_into_array.
+    """
+    text_arr = np.random.default_rng(seed).random(shape, dtype=dtype)
+    text_arr *= scale
+    text_arr_mask = text_into_array(
+        np.zeros(shape, dtype=np.uint8),
+        text_str,
+        loc_tuple,
+        fontsize,
+        font_fill = 1,
+        font = font,
+    ).astype(bool)
+    text_arr[text_arr_mask] = -scale
+
+    return text_arr
+
+@traced
+def hide_message(cover_factors, text_arr, hide_count, seed=None):
+    """
+    hide text_arr (see message_array) in the hide_count smallest singular
+    vectors of the cover's factors. Only the top hide_count singular vectors
+    of the message are needed so they come from randomized_svd, seed is its
+    (pass one for a reproducible result). Returns orthogonalized SVDFactors,
+    see swap_s_vecs_top2bottom.
+    """
+    Ua, sa, VHa = unpack_factors(cover_factors, None, None)
+    Utxt, stxt, VHtxt = arr_svd(text_arr, rank=hide_count, compact=True, seed=seed)
+
+    return swap_s_vecs_top2bottom(
+        Ua, sa, VHa, Utxt, stxt, VHtxt, hide_count, orthogonalize=True,
+    )
+
+def _orthonormalize_against(vecs, basis):
+    """
+    nearest orthonormal columns to vecs (symmetric/Lowdin orthogonalization)
+    within the orthogonal complement of the orthonormal columns of basis
+    """
+    for _ in range(2): # projecting twice is enough for numerical orthogonality
+        vecs = vecs - basis @ (basis.T @ vecs)
+    u, _, vh = np.linalg.svd(vecs, full_matrices=False)
 
-    return Uout, Sout, VHout
+    return u @ vh
 
-def normalize_shift(values, high, low):
+@traced
+def normalize_shift(values, high, low, *, out=None, dtype=None, block_rows=None):
     """
     minmax norm followed by scale and shift
+
+    Computed as one scale and shift written straight into the output, with no
+    full size temporaries.
+
+    ** default params **
+    out -- array to write into (may be values itself, for in place), e.g. a
+        writable memmap. Defaults to a new array. Integer outs (e.g. uint8
+        values in place) get each block computed in float64, rounded and cast.
+
+    Constant values have no range to scale, they come out NaN with a
+    RuntimeWarning (a ValueError for integer outs, which can't hold NaN).
+    dtype -- dtype of the new output array. Defaults to values' dtype if it
+        is floating (so float32 stays float32), else float64.
+    block_rows -- process values this many rows at a time: min and max come
+        from one streaming pass and then each block is rescaled, so memmaps
+        of any size work. None does it all at once.
     """
+    if out is None:
+        out = np.empty(values.shape, dtype=_float_dtype(values.dtype if dtype is None else dtype))
+    assert out.shape == values.shape, "out must have the same shape as values"
+
+    if block_rows is None:
+        v_min, v_max = values.min(), values.max()
+    else:
+        v_min, v_max = np.inf, -np.inf
+        for rows in row_blocks(values.shape[0], block_rows):
+            block = values[rows]
+            v_min = min(v_min, block.min())
+            v_max = max(v_max, block.max())
+
+    integer_out = not np.issubdtype(out.dtype, np.floating)
+    if v_max == v_min:
+        # nothing to scale, 0 / 0 like a plain minmax norm
+        if integer_out:
+            raise ValueError("constant values normalize to NaN, which an integer out can't hold")
+        import warnings
+        warnings.warn(
+            "normalize_shift: values are constant, returning NaN", RuntimeWarning,
+            stacklevel=3, # past the traced wrapper
+        )
+        for rows in row_blocks(values.shape[0], block_rows):
+            out[rows] = np.nan
+        return out
 
-    mmnorm_vals = (values - values.min()) / (values.max() - values.min())
-    spread_vals = mmnorm_vals * (high - low)
+    scale = (high - low) / (float(v_max) - float(v_min))
+    for rows in row_blocks(values.shape[0], block_rows):
+        if integer_out:
+            block = np.subtract(values[rows], v_min, dtype=np.float64)
+            block *= scale
+            block += low
+            out[rows] = np.rint(block, out=block)
+            continue
+        np.subtract(values[rows], v_min, out=out[rows])
+        out[rows] *= scale
+        out[rows] += low
 
-    return spread_vals + low
+    return out
 
+@traced
 def norm_multiplot(*lines, norm=True):
-    fig, ax = plt.subplots()
+    fig, ax = _new_figure(None)
     for a_line in lines:
         if norm:
             norm_line = normalize_shift(a_line, 1, 0)
             ax.plot(norm_line)
         else:
             ax.plot(a_line)
-    plt.show()
+    _show_or_save(fig, None)
 
 if __name__ == "__main__":
-    hide_start = -1100
-    ## get image from provided path argument
-    try:
-        bw_arr = np.load(os.path.join(RAW_DATA, "bw_arr.npy"))
-        bw_loadz = np.load(os.path.join(RAW_DATA, "bw_arr_svd.npz"))
-        Ubw, Sbw, VHbw = [bw_loadz[key] for key in ("U","S","VH")]
-    except:
-        print("loading from scratch, must provide an image path with script call")
-        img_path = sys.argv[1]
-        bw_arr = img2bwarray(img_path, resolution_fraction=.4)
-	np.save(os.path.join(RAW_DATA, "bw_arr.npy"), full_recon)
-	print("saved a copy of the array for next time.")
-        Ubw, Sbw, VHbw = arr_svd(bw_arr)
-	np.savez(os.path.join(RAW_DATA, "bw_arr_svd.npz"), U=Ubw, S=Sbw, VH=VHbw)
-	print("saved SVD for next time")
-
-    print("done loading and svd of image")
+    from contextlib import nullcontext
+    from .svd_cache import cached_arr_svd
+    from .tracing import trace_calls, print_trace_summary
+
+    ## set OUROBOROS_TRACE to a .json (Chrome trace) or .jsonl path to time each stage
+    trace_path = os.environ.get("OUROBOROS_TRACE")
+    with trace_calls(trace_path, memory=True) if trace_path else nullcontext() as trace_records:
+        hide_start = -1100
+        ## get image from provided path argument, otherwise the saved copy
+        if len(sys.argv) > 1:
+            bw_arr = img2bwarray(sys.argv[1], resolution_fraction=.4)
+            np.save(os.path.join(RAW_DATA, "bw_arr.npy"), bw_arr)
+            print("saved a copy of the array for next time.")
+        else:
+            print("no image path provided, loading the saved copy of the array")
+            bw_arr = np.load(os.path.join(RAW_DATA, "bw_arr.npy"))
+        ## the image is 8 bit, float32 factors are plenty and half the size
+        Ubw, Sbw, VHbw = cached_arr_svd(bw_arr, compact=True, dtype=np.float32)
+
+        print("done loading and svd of image")
     
-    ## make secret message
-    scale = 1
-    text_arr = np.random.random(bw_arr.shape) * scale
-    text_arr_mask = text_into_array(
-        np.zeros(text_arr.shape),
-        "You Found Me!",
-        (10,100),
-        200,
-        font_fill = 1,
-    ).astype(bool)
-    text_arr[text_arr_mask] = -scale
-    Utxt, Stxt, VHtxt = arr_svd(text_arr)
-    print("done making and svd of message")
-
-    ## hide message at small singular values
-    Um, Sm, VHm = swap_s_vecs_top2bottom(Ubw, Sbw, VHbw, Utxt, Stxt, VHtxt, -hide_start)
-    full_recon = Um @ Sm @ VHm
-    print("done hiding and rebuilding full_recon")
-
-    ## because swap_s_vecs_top2bottom is quick and dirty, we must reconstruct and loose
-    ## clarity of message.
-    Uh, Sh, Vh = arr_svd(full_recon)
-    print("done svd full_recon")
-
-    lr_plot(Uh, Sh, Vh, start_s_vec=hide_start)
-    bw_plot(full_recon)
-    np.save(os.path.join(RAW_DATA, "bw_arr_pm.npy"), full_recon)
-    print("done showing and saving 'bw_arr_pm.npy' for assignment.")
+        ## make secret message
+        text_arr = message_array(bw_arr.shape, "You Found Me!", (10,100), 200, dtype=np.float32)
+        print("done making message")
+
+        ## hide message at small singular values. The swapped factors are kept
+        ## orthonormal so they are already the svd of full_recon, no need to redo it.
+        Um, Sm, VHm = hide_message((Ubw, Sbw, VHbw), text_arr, -hide_start)
+        full_recon = lowrank_reconstruct(Um, Sm, VHm)
+        print("done hiding and rebuilding full_recon")
+
+        lr_plot(Um, Sm, VHm, start_s_vec=hide_start)
+        bw_plot(full_recon)
+        np.save(os.path.join(RAW_DATA, "bw_arr_pm.npy"), full_recon)
+        print("done showing and saving 'bw_arr_pm.npy' for assignment.")
+
+    if trace_records is not None:
+        print_trace_summary(trace_records)
+        print(f"wrote the trace to {trace_path}")
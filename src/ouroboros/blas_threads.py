@@ -0,0 +1,76 @@
+import os, multiprocessing
+from contextlib import contextmanager
+
+def cpu_count():
+    """
+    number of cores this process may run on (respects CPU affinity, e.g. taskset
+    or a container's cpuset), falling back to os.cpu_count()
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def split_cores(processes=None, n_tasks=None, cores=None):
+    """
+    (processes, threads) so that processes workers with threads BLAS threads
+    each use cores without oversubscribing them.
+
+    ** default params **
+    processes -- number of worker processes, None uses one per core (but no
+        more than n_tasks)
+    n_tasks -- number of tasks that will be run, caps the default processes
+    cores -- cores to split, defaults to cpu_count()
+    """
+    cores = cpu_count() if cores is None else cores
+    if processes is None:
+        processes = cores if n_tasks is None else min(cores, n_tasks)
+    processes = max(1, processes)
+
+    return processes, max(1, cores // processes)
+
+@contextmanager
+def blas_threads(n_threads):
+    """
+    limit the BLAS and OpenMP thread pools (numpy's svd, qr and matmul) of
+    this process to n_threads inside a with block (through threadpoolctl) and
+    restore the previous limits after it. The limit is process wide, so it
+    also applies to other threads running inside the block.
+
+    usage:
+        with blas_threads(1):
+            U, s, VH = arr_svd(arr, compact=True)
+    """
+    from threadpoolctl import threadpool_limits
+
+    assert n_threads >= 1, "n_threads must be at least 1"
+    with threadpool_limits(limits=n_threads):
+        yield
+
+def worker_pool(processes=None, *, threads=None, n_tasks=None, initializer=None, initargs=()):
+    """
+    multiprocessing.Pool whose workers limit their BLAS to threads threads
+    each before running initializer(*initargs), so a pool of svds doesn't
+    start processes * cores BLAS threads and thrash the machine. The
+    platform's default start method is used.
+
+    processes and threads default to an even split of the cores, see
+    split_cores.
+    """
+    processes, auto_threads = split_cores(processes, n_tasks)
+    threads = auto_threads if threads is None else threads
+    assert threads >= 1, "threads must be at least 1"
+
+    return multiprocessing.Pool(
+        processes, initializer=_init_limited_worker, initargs=(threads, initializer, initargs),
+    )
+
+_WORKER_LIMITS = []
+
+def _init_limited_worker(threads, initializer, initargs):
+    from threadpoolctl import threadpool_limits
+
+    # held for the life of the worker
+    _WORKER_LIMITS.append(threadpool_limits(limits=threads))
+    if initializer is not None:
+        initializer(*initargs)
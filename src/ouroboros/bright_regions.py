@@ -0,0 +1,157 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .autodidact_tools import row_blocks
+
+class BrightRegion(namedtuple("BrightRegion", ["top", "left", "window", "mean"])):
+    """
+    window x window box of an image with its top left pixel at (top, left)
+    and the mean brightness inside it
+    """
+    __slots__ = ()
+
+    @property
+    def center(self):
+        """(row, col) of the box's center pixel, e.g. for cross-hairs"""
+        return self.top + self.window // 2, self.left + self.window // 2
+
+    @property
+    def slices(self):
+        """(rows, cols) slices of the box, arr[region.slices] is its pixels"""
+        return slice(self.top, self.top + self.window), slice(self.left, self.left + self.window)
+
+def find_bright_regions(arr, windows=(16,), n_regions=5, *, separation=1.0, block_rows=None):
+    """
+    the n_regions brightest window x window boxes of a 2D arr for each window
+    in windows, as {window: [BrightRegion, ...]} brightest first. Unlike
+    arr.argmax(), which lands on a single hot pixel, this finds where the
+    image is bright over an area (the lighthouse lamp rather than a glint).
+
+    Box sums come from an integral image, so the cost is O(pixels) for each
+    window size however large the window is. Boxes are picked greedily,
+    brightest first (ties go to the top most, then left most box), skipping
+    any within separation * window rows and columns of one already picked
+    (non-maximum suppression), so separation=1 never returns overlapping boxes.
+
+    ** default params **
+    windows -- box sizes in pixels
+    separation -- minimum offset between picked boxes, as a fraction of window
+    block_rows -- work in tiles of this many rows of box positions (each
+        reading max(windows) - 1 extra rows of arr), so memmapped images of
+        any size work. Tiles nominate their brightest boxes, unsuppressed, and
+        the picking runs over all nominations. If that runs past the point
+        where some tile's nominations end before n_regions are picked, the
+        tiles are read again nominating more, so the result is the same as
+        with block_rows=None (for float images up to rounding of the sums).
+    """
+    assert len(arr.shape) == 2, "find_bright_regions only handles 2D arrays"
+    windows = sorted(set(int(window) for window in windows))
+    m, n = arr.shape
+    assert 0 < windows[0] and windows[-1] <= min(m, n), f"windows must be in [1, {min(m, n)}]"
+
+    n_positions = m - windows[0] + 1 # rows of box positions for the smallest window
+    n_nominate = {window: 16 * n_regions for window in windows} # per tile
+    picked = {}
+    while len(picked) < len(windows):
+        pending = [window for window in windows if window not in picked]
+        candidates = {window: [] for window in pending}
+        boundaries = {window: [] for window in pending}
+        for rows in row_blocks(n_positions, block_rows):
+            stop = min(rows.stop, n_positions)
+            integral = _integral_image(np.asarray(arr[rows.start:min(m, stop + windows[-1] - 1)]))
+            for window in pending:
+                n_rows = min(stop, m - window + 1) - rows.start
+                if n_rows <= 0:
+                    continue
+                nominated, boundary = _nominate(
+                    _box_sums(integral, window)[:n_rows], n_nominate[window], rows.start,
+                )
+                candidates[window] += nominated
+                if boundary is not None:
+                    boundaries[window].append(boundary)
+
+        for window in pending:
+            regions = _pick(
+                candidates[window], window, n_regions, separation, min(boundaries[window], default=None),
+            )
+            if regions is None:
+                n_nominate[window] *= 8
+            else:
+                picked[window] = regions
+
+    return {window: picked[window] for window in windows}
+
+def box_means(arr, window):
+    """
+    mean of every window x window box of a 2D arr, indexed by the box's top
+    left pixel, so the result is (m - window + 1, n - window + 1)
+    """
+    return _box_sums(_integral_image(np.asarray(arr)), window) / window**2
+
+def _integral_image(arr):
+    """
+    zero padded 2D cumulative sum, integral[r, c] = arr[:r, :c].sum(). Exact
+    (int64) for integer images.
+    """
+    dtype = np.int64 if np.issubdtype(arr.dtype, np.integer) or arr.dtype == bool else np.float64
+    integral = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1), dtype=dtype)
+    np.cumsum(arr, axis=0, dtype=dtype, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    return integral
+
+def _box_sums(integral, window):
+    """
+    sums of every window x window box, four lookups per box
+    """
+    sums = integral[window:, window:] - integral[:-window, window:]
+    sums -= integral[window:, :-window]
+    sums += integral[:-window, :-window]
+    return sums
+
+def _min_offset(window, separation):
+    return max(1, int(np.ceil(separation * window)))
+
+def _nominate(sums, n_nominate, row_offset):
+    """
+    the n_nominate brightest box positions of a tile's map of box sums as
+    (-sum, top, left) sort keys, and the key of the last one if the tile has
+    more positions (which all sort after it), else None
+    """
+    flat = sums.ravel()
+    if n_nominate >= flat.size:
+        idx, boundary = np.arange(flat.size), None
+    else:
+        # exact top n_nominate, ties broken by position like np.argmax
+        cutoff = np.partition(flat, flat.size - n_nominate)[flat.size - n_nominate]
+        above = np.flatnonzero(flat > cutoff)
+        idx = np.concatenate([above, np.flatnonzero(flat == cutoff)[:n_nominate - above.size]])
+        boundary = (-cutoff.item(), *_position(idx[-1], sums.shape[1], row_offset))
+
+    return [(-flat[i].item(), *_position(i, sums.shape[1], row_offset)) for i in idx], boundary
+
+def _position(flat_idx, n_cols, row_offset):
+    top, left = divmod(int(flat_idx), n_cols)
+    return top + row_offset, left
+
+def _pick(candidates, window, n_regions, separation, boundary):
+    """
+    greedy non-maximum suppression over (-sum, top, left) candidates. Returns
+    None if it would have to go past boundary (some tile has unseen boxes
+    that could come next) before picking n_regions.
+    """
+    offset = _min_offset(window, separation)
+    picked = []
+    for key in sorted(candidates):
+        if len(picked) == n_regions:
+            break
+        if boundary is not None and key > boundary:
+            return None
+        _, top, left = key
+        if all(abs(top - other[1]) >= offset or abs(left - other[2]) >= offset for other in picked):
+            picked.append(key)
+    else:
+        if len(picked) < n_regions and boundary is not None:
+            return None
+
+    return [BrightRegion(top, left, window, -neg_sum / window**2) for neg_sum, top, left in picked]
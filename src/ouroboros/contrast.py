@@ -0,0 +1,83 @@
+import numpy as np
+
+from .autodidact_tools import normalize_shift, row_blocks
+from .tracing import traced
+
+@traced
+def uint8_histogram(arr, block_rows=None):
+    """
+    256 bin histogram (counts of each grey level) of a uint8 image or stack,
+    with np.bincount. Frames are read block_rows rows at a time so memmaps of
+    any size work, None reads each frame at once.
+    """
+    assert arr.dtype == np.uint8, "uint8_histogram needs a uint8 array"
+    hist = np.zeros(256, dtype=np.int64)
+    for idx in np.ndindex(arr.shape[:-2]):
+        frame = arr[idx]
+        for rows in row_blocks(frame.shape[0], block_rows):
+            hist += np.bincount(np.asarray(frame[rows]).ravel(), minlength=256)
+
+    return hist
+
+@traced
+def stretch_limits(hist, low_pct=0.5, high_pct=99.5):
+    """
+    pseudo min and max grey levels from a histogram (see uint8_histogram):
+    the lowest level with more than low_pct percent of pixels at or below it,
+    and the lowest level with at least high_pct percent at or below it.
+    0 and 100 give the true min and max.
+    """
+    cdf = np.cumsum(hist)
+    low = np.searchsorted(cdf, cdf[-1] * low_pct / 100, side="right")
+    high = np.searchsorted(cdf, cdf[-1] * high_pct / 100, side="left")
+
+    return int(low), int(high)
+
+@traced
+def stretch_lut(low, high):
+    """
+    256 entry uint8 lookup table that clips grey levels to [low, high] and
+    rescales them to 0-255. Identity if high <= low (nothing to stretch).
+    """
+    levels = np.arange(256)
+    if high <= low:
+        return levels.astype(np.uint8)
+
+    return np.rint(normalize_shift(np.clip(levels, low, high), 255, 0)).astype(np.uint8)
+
+@traced
+def contrast_stretch(arr, low_pct=0.5, high_pct=99.5, *, limits=None, out=None, block_rows=None):
+    """
+    exposure adjust a uint8 image: clip to the low_pct and high_pct
+    percentile grey levels (its pseudo min and max) and stretch those to 0
+    and 255. The percentiles come from a bincount histogram and the mapping
+    is applied as a 256 entry lookup table, so no float copies of arr are
+    made.
+
+    A (..., m, n) stack is stretched frame by frame, each with its own
+    limits, reading block_rows rows at a time. Memmapped stacks (and a
+    memmapped out, e.g. np.lib.format.open_memmap) stream through in
+    constant memory.
+
+    ** default params **
+    limits -- (low, high) grey levels to use for every frame instead of
+        percentiles, e.g. stretch_limits(uint8_histogram(stack)) for one
+        stretch across a whole stack
+    out -- uint8 array to write into (may be arr itself), defaults to a new one
+    block_rows -- rows per block, None does each frame at once
+    """
+    assert arr.dtype == np.uint8, "contrast_stretch needs a uint8 array"
+    if out is None:
+        out = np.empty(arr.shape, dtype=np.uint8)
+    assert out.shape == arr.shape and out.dtype == np.uint8, "out must be a uint8 array shaped like arr"
+
+    if limits is not None:
+        lut = stretch_lut(*limits)
+    for idx in np.ndindex(arr.shape[:-2]):
+        frame, out_frame = arr[idx], out[idx]
+        if limits is None:
+            lut = stretch_lut(*stretch_limits(uint8_histogram(frame, block_rows), low_pct, high_pct))
+        for rows in row_blocks(frame.shape[0], block_rows):
+            np.take(lut, frame[rows], out=out_frame[rows])
+
+    return out
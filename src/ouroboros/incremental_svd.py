@@ -0,0 +1,129 @@
+import numpy as np
+
+from .autodidact_tools import SVDFactors, arr_svd, unpack_factors
+
+class IncrementalSVD:
+    """
+    svd of a matrix that grows a block of columns (axis=1) or rows (axis=0)
+    at a time, updated with Brand's method (Brand 2006, "Fast low-rank
+    modifications of the thin singular value decomposition") instead of
+    re-running arr_svd on the whole history.
+
+    The side that grows (VH for columns, U for rows) is kept as a small
+    rotation times a list of blocks that are never rewritten, so an update
+    costs O((m + c) * k**2 + (k + c)**3) for k singular values and c new
+    columns, independent of how many have come before. Every reorth_every
+    updates the factors are materialized and re-orthonormalized to stop
+    rounding error from building up.
+
+    ** default params **
+    rank -- keep only the leading rank singular triplets after each update,
+        None keeps them all (then the growing side is rebuilt every update)
+    reorth_every -- updates between re-orthonormalizations, None never does
+
+    usage:
+        inc = IncrementalSVD(first_frames, axis=1, rank=50)
+        for frame in frames:
+            inc.append(frame.reshape(-1, 1))
+        U, s, VH = inc.factors
+    """
+
+    def __init__(self, initial, *, axis=1, rank=None, reorth_every=50):
+        """
+        initial may be a 2D array or its (U, S, VH) / SVDFactors
+        """
+        assert axis in (0, 1), "axis must be 0 (append rows) or 1 (append columns)"
+        if isinstance(initial, tuple):
+            U, s, VH = unpack_factors(initial, None, None)
+        else:
+            U, s, VH = arr_svd(initial, compact=True)
+
+        self.axis = axis
+        self.rank = rank
+        self.reorth_every = reorth_every
+        self.n_updates = 0
+
+        # work in "append columns" orientation, rows are appended to the transpose
+        if axis == 0:
+            U, VH = VH.T, U.T
+        self._U = np.array(U, dtype=np.float64)
+        self._s = np.array(s, dtype=np.float64)
+        self._W = np.eye(self._s.size)
+        self._VH_blocks = [np.array(VH, dtype=np.float64)]
+        self._truncate(self._s.size if rank is None else min(rank, self._s.size))
+
+    @property
+    def factors(self):
+        """
+        current SVDFactors (U, s, VH) of the whole matrix
+        """
+        VH = self._W @ np.hstack(self._VH_blocks)
+        if self.axis == 0:
+            return SVDFactors(VH.T, self._s.copy(), self._U.T)
+        return SVDFactors(self._U.copy(), self._s.copy(), VH)
+
+    def append(self, block):
+        """
+        fold new columns (axis=1, shape m x c) or rows (axis=0, shape c x n)
+        into the factors.
+        """
+        C = np.asarray(block, dtype=np.float64)
+        if self.axis == 0:
+            C = C.T
+        assert C.shape[0] == self._U.shape[0], f"block must be {self._U.shape[0]} {'columns' if self.axis == 0 else 'rows'} long"
+
+        # split the new columns into the part in span(U) and an orthogonal remainder
+        k, c = self._s.size, C.shape[1]
+        L = self._U.T @ C
+        J, K = np.linalg.qr(C - self._U @ L)
+
+        core = np.zeros((k + K.shape[0], k + c))
+        core[:k, :k] = np.diag(self._s)
+        core[:k, k:] = L
+        core[k:, k:] = K
+        U_core, s_core, VH_core = np.linalg.svd(core, full_matrices=False)
+
+        # can't have more singular values than rows
+        r = min(s_core.size, self._U.shape[0])
+        if self.rank is not None:
+            r = min(self.rank, r)
+        self._U = np.hstack([self._U, J]) @ U_core[:, :r]
+        self._s = s_core[:r]
+
+        # VH becomes [VH_core[:r, :k] @ W @ blocks, VH_core[:r, k:]]
+        W_new = VH_core[:r, :k] @ self._W
+        if W_new.shape[0] == W_new.shape[1]:
+            self._W = W_new
+            self._VH_blocks.append(np.linalg.pinv(W_new) @ VH_core[:r, k:])
+        else:
+            # rank changed, rebuild the growing side at its new size
+            VH = np.hstack([W_new @ np.hstack(self._VH_blocks), VH_core[:r, k:]])
+            self._W = np.eye(r)
+            self._VH_blocks = [VH]
+
+        self.n_updates += 1
+        if self.reorth_every and self.n_updates % self.reorth_every == 0:
+            self.reorthogonalize()
+
+    def reorthogonalize(self):
+        """
+        materialize the growing side and restore orthonormal U and VH
+        """
+        VH = self._W @ np.hstack(self._VH_blocks)
+        Qu, Ru = np.linalg.qr(self._U)
+        Qv, Rv = np.linalg.qr(VH.T)
+        U_core, s, VH_core = np.linalg.svd((Ru * self._s) @ Rv.T)
+
+        self._U = Qu @ U_core
+        self._s = s
+        self._W = np.eye(s.size)
+        self._VH_blocks = [VH_core @ Qv.T]
+
+    def _truncate(self, r):
+        """
+        keep the leading r singular triplets of the initial factors
+        """
+        self._U = self._U[:, :r]
+        self._s = self._s[:r]
+        self._W = self._W[:r, :r]
+        self._VH_blocks = [self._VH_blocks[0][:r]]
@@ -0,0 +1,85 @@
+import glob, multiprocessing
+
+import numpy as np
+
+from .autodidact_tools import img2bwarray
+from .tracing import traced
+
+@traced
+def imgs2bwstack(image_paths, out_path, resolution_fraction=1, *, shape=None, processes=None, progress=True):
+    """
+    img2bwarray for many images at once. Frames are decoded across a process
+    pool and each worker writes straight into a uint8 (n_images, rows, cols)
+    .npy stack at out_path, so no arrays are pickled back to this process.
+
+    A file that can't be decoded, or comes out a different shape than the
+    stack, is skipped (its frame stays zero) and reported instead of stopping
+    the batch. Returns the stack (memory-mapped) and a dict of path: error.
+
+    ** default params **
+    image_paths -- list of paths or a glob pattern string (sorted)
+    shape -- (rows, cols) of each frame, defaults to that of the first image
+    processes -- pool size, defaults to os.cpu_count()
+    progress -- print a running count, or a callable(n_done, n_total)
+    """
+    if isinstance(image_paths, str):
+        image_paths = sorted(glob.glob(image_paths))
+    image_paths = list(image_paths)
+    assert image_paths, "no images to ingest"
+
+    if shape is None:
+        for path in image_paths:
+            try:
+                shape = img2bwarray(path, resolution_fraction).shape
+                break
+            except Exception:
+                continue
+        assert shape is not None, "none of the images could be decoded"
+
+    stack = np.lib.format.open_memmap(
+        out_path, mode="w+", dtype=np.uint8, shape=(len(image_paths), *shape)
+    )
+    del stack # workers open their own view, flushes the header to disk
+
+    if progress is True:
+        progress = lambda n_done, n_total: print(f"\ringested {n_done}/{n_total}", end="", flush=True)
+
+    failures = {}
+    with multiprocessing.Pool(
+        processes, initializer=_init_ingest_worker, initargs=(out_path, resolution_fraction),
+    ) as pool:
+        tasks = pool.imap_unordered(_ingest_one, enumerate(image_paths), chunksize=8)
+        for n_done, (idx, error) in enumerate(tasks, start=1):
+            if error is not None:
+                failures[image_paths[idx]] = error
+            if progress:
+                progress(n_done, len(image_paths))
+    if progress:
+        print(f"\n{len(failures)} of {len(image_paths)} images failed")
+
+    return np.load(out_path, mmap_mode="r+"), failures
+
+_INGEST_STATE = {}
+
+def _init_ingest_worker(out_path, resolution_fraction):
+    """
+    open the output stack once per worker process
+    """
+    _INGEST_STATE["stack"] = np.load(out_path, mmap_mode="r+")
+    _INGEST_STATE["resolution_fraction"] = resolution_fraction
+
+def _ingest_one(task):
+    """
+    decode one (index, path) task into the worker's stack, errors are returned
+    """
+    idx, path = task
+    stack = _INGEST_STATE["stack"]
+    try:
+        bw_mat = img2bwarray(path, _INGEST_STATE["resolution_fraction"])
+        if bw_mat.shape != stack.shape[1:]:
+            raise ValueError(f"frame is {bw_mat.shape}, stack frames are {stack.shape[1:]}")
+        stack[idx] = bw_mat
+    except Exception as e:
+        return idx, f"{type(e).__name__}: {e}"
+
+    return idx, None
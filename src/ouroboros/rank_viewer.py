@@ -0,0 +1,141 @@
+from collections import OrderedDict
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.widgets import RangeSlider
+
+from .autodidact_tools import unpack_factors, resolve_s_slice
+
+class RankViewer:
+    """
+    interactive lr_plot: a range slider picks start_s_vec and end_s_vec (same
+    meaning as in lowrank_reconstruct) and the image updates as you drag.
+
+    Moving the slider only adds or subtracts the singular vectors that
+    entered or left the range (or rebuilds the range directly when that is
+    cheaper), the last cache_size reconstructions are kept, and the image is
+    redrawn by blitting, so the figure is never redrawn while dragging.
+    Reconstructions are float32, for display.
+
+    usage:
+        viewer = RankViewer(arr_svd(arr, compact=True))
+        viewer.reconstruction(0, 49) # the array currently shown
+    """
+
+    def __init__(self, U, S=None, VH=None, *, start_s_vec=0, end_s_vec=None, vmin=None, vmax=None, cache_size=16, refresh_every=64, show=True):
+        """
+        ** default params **
+        start_s_vec, end_s_vec -- initial slider range, see lowrank_reconstruct
+        vmin, vmax -- fixed color limits, default to the full reconstruction's
+        cache_size -- number of reconstructions kept for revisiting
+        refresh_every -- incremental updates before rebuilding from scratch,
+            limits float32 rounding drift
+        show -- call plt.show() at the end
+        """
+        U, s, VH = unpack_factors(U, S, VH)
+        n_svals = min(U.shape[1], VH.shape[0])
+        self._Us = np.ascontiguousarray(U[:, :n_svals] * s[:n_svals], dtype=np.float32)
+        self._VH = np.ascontiguousarray(VH[:n_svals], dtype=np.float32)
+        self._buf = np.empty((U.shape[0], VH.shape[1]), dtype=np.float32)
+        self._scratch = np.empty_like(self._buf)
+        self._range = None
+        self._n_incremental = 0
+        self.refresh_every = refresh_every
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+        if vmin is None or vmax is None:
+            full = self.reconstruction(0, n_svals - 1)
+            vmin = full.min() if vmin is None else vmin
+            vmax = full.max() if vmax is None else vmax
+
+        start_s_vec, end_s_vec = resolve_s_slice(n_svals, start_s_vec, end_s_vec, alert=False)
+        self.fig, self.ax = plt.subplots()
+        self.fig.subplots_adjust(bottom=0.2)
+        self.image = self.ax.imshow(
+            self.reconstruction(start_s_vec, end_s_vec), cmap="gray", vmin=vmin, vmax=vmax, animated=True,
+        )
+        slider_ax = self.fig.add_axes([0.15, 0.05, 0.7, 0.04])
+        self.slider = RangeSlider(
+            slider_ax, "s_vecs", 0, n_svals - 1, valinit=(start_s_vec, end_s_vec), valstep=1,
+        )
+        self.slider.drawon = False # the slider is blitted with the image instead
+        self.slider.on_changed(self._on_slider)
+
+        self._background = None
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+        if show:
+            plt.show()
+
+    def reconstruction(self, start_s_vec, end_s_vec):
+        """
+        float32 reconstruction from singular vectors start_s_vec to end_s_vec
+        (inclusive). The returned array is reused, copy it to keep it.
+        """
+        key = (int(start_s_vec), int(end_s_vec))
+        if key == self._range:
+            return self._buf
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self._buf[...] = self._cache[key]
+        else:
+            self._move_to(*key)
+            self._cache[key] = self._buf.copy()
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        self._range = key
+
+        return self._buf
+
+    def _move_to(self, start, end):
+        """
+        update self._buf from the current range to [start, end]
+        """
+        # S(k) = sum of the first k rank-1 terms, so
+        # [start, end] - [old_start, old_end] = (S(old_start) - S(start)) + (S(end + 1) - S(old_end + 1))
+        n_direct = max(end - start + 1, 0)
+        if self._range is not None:
+            old_start, old_end = self._range
+            n_changed = abs(old_start - start) + abs(old_end - end)
+        if self._range is None or n_changed >= n_direct or self._n_incremental >= self.refresh_every:
+            self._buf[...] = 0
+            self._add(start, end + 1, 1)
+            self._n_incremental = 0
+            return
+
+        self._add(start, old_start, 1)
+        self._add(old_end + 1, end + 1, 1)
+        self._n_incremental += 1
+
+    def _add(self, lo, hi, sign):
+        """
+        add (or subtract, if hi < lo) the rank-1 terms lo:hi to self._buf
+        """
+        if lo > hi:
+            lo, hi, sign = hi, lo, -sign
+        if lo == hi:
+            return
+        np.matmul(self._Us[:, lo:hi], self._VH[lo:hi], out=self._scratch)
+        if sign > 0:
+            self._buf += self._scratch
+        else:
+            self._buf -= self._scratch
+
+    def _on_draw(self, event):
+        """
+        full redraws (resize, first show) refresh the blit background
+        """
+        self._background = self.fig.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.image)
+
+    def _on_slider(self, val):
+        self.image.set_data(self.reconstruction(*val))
+        canvas = self.fig.canvas
+        if self._background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self._background)
+        self.ax.draw_artist(self.image)
+        self.slider.ax.draw_artist(self.slider.ax)
+        canvas.blit(self.ax.bbox)
+        canvas.blit(self.slider.ax.bbox)
@@ -0,0 +1,108 @@
+import os, multiprocessing
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .autodidact_tools import lowrank_sweep
+from .blas_threads import cpu_count, worker_pool
+from .shared_factors import SharedFactors, attach_factors
+
+def render_panels(arrays, out_paths, *, vmin=None, vmax=None, titles=None, figsize=(6.4, 4.8), dpi=100, processes=None):
+    """
+    save each 2D array (bw_plot style, gray cmap) to the matching out_path
+    (.png, .svg, ... by extension) across a process pool. Rendering is
+    headless (Agg) and each worker draws every panel on one reused figure,
+    only swapping the image data, so nothing waits on a display.
+
+    ** default params **
+    arrays -- sequence of 2D arrays or a 3D stack (e.g. a memmap)
+    vmin, vmax -- color limits for every panel, None uses each panel's min/max
+    titles -- optional title per panel
+    processes -- pool size, defaults to os.cpu_count()
+    """
+    out_paths = list(out_paths)
+    assert len(arrays) == len(out_paths), "need one out_path per array"
+    titles = [None] * len(out_paths) if titles is None else list(titles)
+
+    tasks = (
+        (np.asarray(arrays[idx]), out_paths[idx], titles[idx], vmin, vmax)
+        for idx in range(len(out_paths))
+    )
+    with multiprocessing.Pool(
+        processes, initializer=_init_panel_worker, initargs=(figsize, dpi),
+    ) as pool:
+        for _ in pool.imap_unordered(_render_panel, tasks, chunksize=4):
+            pass
+
+    return out_paths
+
+def render_rank_sweep(factors, end_s_vecs, out_dir, *, start_s_vec=0, fmt="png", vmin=None, vmax=None, figsize=(6.4, 4.8), dpi=100, processes=None):
+    """
+    render lowrank_reconstruct(factors, start_s_vec=start_s_vec, end_s_vec=k)
+    for every k in end_s_vecs to out_dir/rank_<k>.<fmt>. The factors are put
+    in shared memory once (see SharedFactors) and mapped by every worker, and
+    each worker builds its (contiguous) share of the ranks with lowrank_sweep,
+    so only the newly added singular vectors are multiplied out for each
+    panel. The matmuls' BLAS threads split the cores
+    with the workers (see worker_pool). Returns the written paths.
+
+    see render_panels for the other params
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    end_s_vecs = sorted(end_s_vecs)
+    if not end_s_vecs:
+        return []
+    processes = cpu_count() if processes is None else processes
+
+    n_chunks = min(len(end_s_vecs), processes)
+    chunks = [list(chunk) for chunk in np.array_split(end_s_vecs, n_chunks) if len(chunk)]
+    tasks = [(chunk, start_s_vec, out_dir, fmt, vmin, vmax) for chunk in chunks]
+    with SharedFactors(factors) as shared, worker_pool(
+        len(chunks), initializer=_init_panel_worker, initargs=(figsize, dpi, shared.handle),
+    ) as pool:
+        written = pool.map(_render_sweep_chunk, tasks)
+
+    return [path for paths in written for path in paths]
+
+_PANEL_STATE = {}
+
+def _init_panel_worker(figsize, dpi, factors_handle=None):
+    """
+    one headless figure per worker, reused for every panel, and the shared
+    factors for rank sweeps
+    """
+    factors = None if factors_handle is None else attach_factors(factors_handle)
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    _PANEL_STATE.update(fig=fig, ax=ax, image=ax.imshow(np.zeros((1, 1)), cmap="gray"), factors=factors)
+
+def _draw_panel(arr, out_path, title, vmin, vmax):
+    """
+    swap arr into the worker's figure and save it
+    """
+    ax, image = _PANEL_STATE["ax"], _PANEL_STATE["image"]
+    rows, cols = arr.shape
+    image.set_data(arr)
+    image.set_extent((-0.5, cols - 0.5, rows - 0.5, -0.5))
+    ax.set_xlim(-0.5, cols - 0.5)
+    ax.set_ylim(rows - 0.5, -0.5)
+    image.set_clim(arr.min() if vmin is None else vmin, arr.max() if vmax is None else vmax)
+    ax.set_title(title or "")
+    _PANEL_STATE["fig"].savefig(out_path)
+
+def _render_panel(task):
+    _draw_panel(*task)
+
+def _render_sweep_chunk(task):
+    chunk, start_s_vec, out_dir, fmt, vmin, vmax = task
+    paths = []
+    for end_s_vec, lr in lowrank_sweep(
+        _PANEL_STATE["factors"], end_s_vecs=chunk, start_s_vec=start_s_vec, alert=False,
+    ):
+        path = os.path.join(out_dir, f"rank_{end_s_vec:05d}.{fmt}")
+        _draw_panel(lr, path, f"s_vecs {start_s_vec}:{end_s_vec}", vmin, vmax)
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,123 @@
+import sys, weakref
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .autodidact_tools import SVDFactors, unpack_factors
+
+# picklable description of a SharedFactors block: its name and, for U, s and
+# VH, (shape, dtype string, byte offset)
+FactorsHandle = namedtuple("FactorsHandle", ["name", "layout"])
+
+_ALIGN = 64 # byte alignment of each factor in the block
+_ATTACHED = {} # name: (SharedMemory, SVDFactors), per worker process
+
+class SharedFactors:
+    """
+    U, s and VH copied once into a single multiprocessing.shared_memory
+    block, so worker processes map the same memory instead of each getting
+    (and unpickling) its own copy. Hand workers .handle, a small picklable
+    FactorsHandle, and call attach_factors(handle) in them.
+
+    The block belongs to this object and is unlinked by close(), on leaving a
+    with block (exception or not), when the object is garbage collected or at
+    interpreter exit. If the process dies without any of those, e.g. it is
+    killed, multiprocessing's resource tracker unlinks it. Handles are meant
+    for processes started through multiprocessing by the owner.
+
+    usage:
+        with SharedFactors(arr_svd(arr, compact=True)) as shared:
+            with worker_pool(initializer=init, initargs=(shared.handle,)) as pool:
+                ...  # init calls attach_factors(handle)
+    """
+
+    def __init__(self, U, S=None, VH=None):
+        """
+        U, S, VH as for lowrank_reconstruct (S may be dense, it is stored as
+        the 1D s). The arrays are copied in and can be dropped afterwards.
+        """
+        U, s, VH = unpack_factors(U, S, VH)
+        layout, offset = [], 0
+        for arr in (U, s, VH):
+            layout.append((tuple(arr.shape), np.dtype(arr.dtype).str, offset))
+            offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self._finalizer = weakref.finalize(self, _release, self._shm)
+        self.handle = FactorsHandle(self._shm.name, tuple(layout))
+        self.factors = _factor_views(self._shm, self.handle.layout)
+        for view, arr in zip(self.factors, (U, s, VH)):
+            view[...] = arr
+
+    @property
+    def nbytes(self):
+        return self._shm.size
+
+    def close(self):
+        """
+        unlink the block. Workers that attached it keep their mapping until
+        they exit, .factors can't be used after this.
+        """
+        self.factors = None
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def attach_factors(handle):
+    """
+    read only SVDFactors views of the factors published by a SharedFactors,
+    from its handle. Each process attaches a block once, later calls return
+    the same views.
+    """
+    if handle.name not in _ATTACHED:
+        shm = _attach(handle.name)
+        factors = _factor_views(shm, handle.layout)
+        for view in factors:
+            view.flags.writeable = False
+        _ATTACHED[handle.name] = (shm, factors)
+
+    return _ATTACHED[handle.name][1]
+
+def detach_factors(handle):
+    """
+    drop this process's views of a block attached with attach_factors and
+    unmap it, e.g. in a worker that goes through many blocks. Views still
+    held elsewhere keep the mapping until they are gone.
+    """
+    shm, _ = _ATTACHED.pop(handle.name, (None, None))
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass # views are still held somewhere, unmapped when they go
+
+def _attach(name):
+    """
+    open an existing block without taking over its cleanup. Before Python
+    3.13 attaching always registers the block with the resource tracker, but
+    multiprocessing children share the owner's tracker, so that is harmless.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+def _factor_views(shm, layout):
+    return SVDFactors(*(
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        for shape, dtype, offset in layout
+    ))
+
+def _release(shm):
+    """
+    unmap and unlink an owned block
+    """
+    try:
+        shm.close()
+    except BufferError:
+        pass # views are still held somewhere, the mapping goes with the process
+    shm.unlink()
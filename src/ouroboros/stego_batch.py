@@ -0,0 +1,152 @@
+import os
+from multiprocessing import resource_tracker
+
+import numpy as np
+
+from .autodidact_tools import (
+    img2bwarray, arr_svd, message_array, hide_message, lowrank_reconstruct,
+)
+from .blas_threads import worker_pool
+from .shared_factors import SharedFactors, attach_factors, detach_factors
+from .svd_cache import cached_arr_svd
+
+def hide_messages_batch(
+    covers,
+    messages,
+    out_dir,
+    *,
+    hide_count=1100,
+    loc_tuple=(10, 100),
+    fontsize=200,
+    scale=1,
+    resolution_fraction=1,
+    seed=None,
+    processes=None,
+    threads=None,
+    messages_per_task=8,
+    cache_dir=None,
+    cache_bytes=2 * 1024**3,
+    dtype=None,
+    font="Arial.ttf",
+    progress=True,
+):
+    """
+    hide every message in every cover image (the __main__ demo of
+    autodidact_tools, many times over) and save each watermarked image to
+    out_dir as cover<cover index>[_<file name>]_msg<message index>.npy.
+
+    Covers are done one at a time: each is decoded and decomposed once, in
+    this process, and its factors are put in shared memory (see
+    SharedFactors) for the pool's workers, which hide its messages in tasks
+    of messages_per_task messages. Every image is written as soon as it is
+    made, so only one cover's factors are ever held in memory. Returns the
+    written paths in (cover, message) order.
+
+    ** default params **
+    covers -- image paths, .npy paths or 2D arrays
+    resolution_fraction -- passed to img2bwarray for image paths
+    processes, threads -- worker processes and BLAS threads per worker,
+        default to splitting the cores between them (see split_cores)
+    seed -- makes the message noise and its randomized svd, so each
+        watermarked image, reproducible per (cover, message)
+    cache_dir, cache_bytes -- if cache_dir is given the covers' factors are
+        cached there with that size budget (see cached_arr_svd) so reruns
+        skip the svds. None decomposes without caching.
+    dtype -- floating dtype of the factors, messages and outputs, e.g.
+        np.float32 to halve memory and disk use. None is float64.
+    font -- font file for the message text, see text_into_array
+    progress -- print a running count, or a callable(n_done, n_total)
+    see message_array and hide_message for the rest
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    covers = list(covers)
+    messages = list(messages)
+    names = [_cover_name(cover, idx) for idx, cover in enumerate(covers)]
+
+    hide_kwargs = dict(
+        hide_count=hide_count, loc_tuple=loc_tuple, fontsize=fontsize, scale=scale,
+        seed=seed, dtype=np.float64 if dtype is None else dtype, font=font,
+    )
+    msg_chunks = _chunks(list(enumerate(messages)), messages_per_task)
+    n_total = len(covers) * len(messages)
+    if progress is True:
+        progress = lambda n_done, n_total: print(f"\rhid {n_done}/{n_total} messages", end="", flush=True)
+
+    # the covers' blocks are made after the workers start, which only share
+    # this process's resource tracker (see attach_factors) if it is running
+    resource_tracker.ensure_running()
+    paths = {}
+    with worker_pool(processes, threads=threads, n_tasks=len(msg_chunks)) as pool:
+        for cover_idx, cover in enumerate(covers):
+            factors = _cover_factors(cover, resolution_fraction, cache_dir, cache_bytes, hide_kwargs["dtype"])
+            with SharedFactors(factors) as shared:
+                del factors
+                tasks = [
+                    (cover_idx, shared.handle, names[cover_idx], out_dir, msg_chunk, hide_kwargs)
+                    for msg_chunk in msg_chunks
+                ]
+                for written in pool.imap_unordered(_hide_task, tasks):
+                    paths.update(written)
+                    if progress:
+                        progress(len(paths), n_total)
+    if progress:
+        print()
+
+    return [paths[key] for key in sorted(paths)]
+
+def _cover_name(cover, idx):
+    """
+    cover index plus its file name stem for paths, the index keeps names unique
+    """
+    if isinstance(cover, (str, os.PathLike)):
+        return f"cover{idx:04d}_{os.path.splitext(os.path.basename(cover))[0]}"
+    return f"cover{idx:04d}"
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def _load_cover(cover, resolution_fraction):
+    """
+    cover as a 2D array from an image path, a .npy path or an array
+    """
+    if isinstance(cover, (str, os.PathLike)):
+        if os.fspath(cover).endswith(".npy"):
+            return np.load(cover)
+        return img2bwarray(cover, resolution_fraction)
+    return np.asarray(cover)
+
+def _cover_factors(cover, resolution_fraction, cache_dir, cache_bytes, dtype):
+    """
+    compact factors of one cover, through the svd cache if cache_dir is given
+    """
+    arr = _load_cover(cover, resolution_fraction)
+    if cache_dir is None:
+        return arr_svd(arr, compact=True, dtype=dtype)
+    return cached_arr_svd(arr, cache_dir=cache_dir, max_bytes=cache_bytes, compact=True, dtype=dtype)
+
+def _hide_task(task):
+    """
+    hide a chunk of messages in one cover, returns {(cover, message): path}
+    """
+    cover_idx, factors_handle, name, out_dir, msg_chunk, kw = task
+    factors = attach_factors(factors_handle)
+    shape = (factors.U.shape[0], factors.VH.shape[1])
+
+    written = {}
+    try:
+        for msg_idx, text_str in msg_chunk:
+            msg_seed = None if kw["seed"] is None else [kw["seed"], cover_idx, msg_idx]
+            text_arr = message_array(
+                shape, text_str, kw["loc_tuple"], kw["fontsize"], kw["scale"], msg_seed, kw["dtype"], kw["font"],
+            )
+            hidden = lowrank_reconstruct(hide_message(factors, text_arr, kw["hide_count"], msg_seed))
+
+            path = os.path.join(out_dir, f"{name}_msg{msg_idx:05d}.npy")
+            np.save(path, hidden)
+            written[(cover_idx, msg_idx)] = path
+    finally:
+        # the cover's block is unlinked once its messages are done
+        factors = None
+        detach_factors(factors_handle)
+
+    return written
@@ -1,7 +1,6 @@
-import matplotlib.pyplot as plt
-
 def hello_world():
-    
+    import matplotlib.pyplot as plt
+
     monitor_scale = .9
     box_x = [-1,-1,1,1,-1,-1]
     box_y = [0,1,1,-1,-1,0]
@@ -0,0 +1,135 @@
+import os, hashlib, shutil, tempfile
+
+import numpy as np
+
+from .autodidact_tools import SVDFactors, arr_svd, row_blocks
+from .tracing import traced
+
+SVD_CACHE_DIR = os.environ.get(
+    "OUROBOROS_SVD_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "ouroboros", "svd")
+)
+
+@traced
+def cached_arr_svd(arr, *, cache_dir=None, max_bytes=2 * 1024**3, **svd_kwargs):
+    """
+    arr_svd backed by an on-disk cache keyed on the content of arr (its bytes,
+    shape and dtype) and the svd options, so an edited image never gets stale
+    factors. Factors are stored as .npy files and come back memory-mapped
+    (read only). After each new entry the least recently used entries are
+    deleted until the cache holds at most max_bytes.
+
+    ** default params **
+    cache_dir -- where entries live, defaults to SVD_CACHE_DIR (set with the
+        OUROBOROS_SVD_CACHE environment variable)
+    max_bytes -- size budget for the whole cache directory
+
+    svd_kwargs are passed to arr_svd. Factors are always computed and stored
+    compact (see arr_svd), compact=False only expands s into the dense S, so
+    stacks (which arr_svd only decomposes compact) need compact=True.
+    """
+    assert "U_out" not in svd_kwargs, "U_out can't be combined with the cache"
+    compact = svd_kwargs.pop("compact", False)
+    assert compact or len(arr.shape) == 2, "stacked arrays are only cached with compact=True"
+    compute_uv = svd_kwargs.get("compute_uv", True)
+    _, loaded = _cached_svd_entry(arr, cache_dir, max_bytes, svd_kwargs)
+
+    if not compute_uv:
+        s = loaded[0]
+        if compact:
+            return s
+        S = np.zeros(arr.shape, dtype=s.dtype)
+        S[:s.size, :s.size] = np.diag(s)
+        return S
+    factors = SVDFactors(*loaded)
+    if compact:
+        return factors
+    return factors.U, factors.S, factors.VH
+
+@traced
+def svd_cache_key(arr, **svd_kwargs):
+    """
+    hex digest of arr's bytes, shape and dtype plus the svd options.
+    arr is hashed in row blocks so memmaps aren't loaded all at once. A dtype
+    option hashes the same however it is spelled (np.float32, "float32", ...).
+    """
+    if svd_kwargs.get("dtype") is not None:
+        svd_kwargs["dtype"] = np.dtype(svd_kwargs["dtype"]).str
+
+    digest = hashlib.sha256()
+    digest.update(repr((tuple(arr.shape), np.dtype(arr.dtype).str)).encode())
+    digest.update(repr(sorted(svd_kwargs.items())).encode())
+
+    row_bytes = max(int(np.prod(arr.shape[1:])) * np.dtype(arr.dtype).itemsize, 1)
+    for rows in row_blocks(arr.shape[0], max(1, 2**26 // row_bytes)):
+        digest.update(np.ascontiguousarray(arr[rows]).data)
+
+    return digest.hexdigest()
+
+def _cached_svd_entry(arr, cache_dir, max_bytes, svd_kwargs):
+    """
+    (entry dir, memory-mapped compact factors) for arr, computing and storing
+    them on a miss. See cached_arr_svd.
+    """
+    cache_dir = SVD_CACHE_DIR if cache_dir is None else cache_dir
+    compute_uv = svd_kwargs.get("compute_uv", True)
+
+    entry = os.path.join(cache_dir, svd_cache_key(arr, **svd_kwargs))
+    try:
+        loaded = _load_svd_cache_entry(entry, compute_uv)
+    except FileNotFoundError:
+        result = arr_svd(arr, compact=True, **svd_kwargs)
+        names = ("U", "s", "VH") if compute_uv else ("s",)
+        _store_cache_entry(entry, dict(zip(names, result if compute_uv else [result])))
+        _evict_svd_cache(cache_dir, max_bytes, keep=entry)
+        # memory-mapped like a hit, so callers see the same (read only) arrays
+        loaded = _load_svd_cache_entry(entry, compute_uv)
+
+    return entry, loaded
+
+def _load_svd_cache_entry(entry, compute_uv=True):
+    """
+    the memory-mapped (read only) [U, s, VH], or [s] for compute_uv=False, of
+    an existing cached_arr_svd entry dir, marking it as recently used. Raises
+    FileNotFoundError if the entry isn't there (e.g. it was evicted).
+    """
+    names = ("U", "s", "VH") if compute_uv else ("s",)
+    loaded = [np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r") for name in names]
+    os.utime(entry) # mark as recently used
+    return loaded
+
+def _store_cache_entry(entry, arrays):
+    """
+    write arrays as .npy files into a temp dir then rename it into place, so a
+    half written entry is never picked up.
+    """
+    cache_dir = os.path.dirname(entry)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_entry = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-")
+    for name, value in arrays.items():
+        np.save(os.path.join(tmp_entry, f"{name}.npy"), value)
+    try:
+        os.replace(tmp_entry, entry)
+    except OSError:
+        # another process stored the same entry first
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+def _evict_svd_cache(cache_dir, max_bytes, keep=None):
+    """
+    delete least recently used cache entries until at most max_bytes remain.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        size = sum(f.stat().st_size for f in os.scandir(path) if f.is_file())
+        entries.append((os.stat(path).st_mtime, size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
@@ -0,0 +1,164 @@
+import os, json, struct
+
+import numpy as np
+
+from .autodidact_tools import arr_svd
+from .blas_threads import worker_pool
+
+MAGIC = b"OUROSVD1"
+FOOTER = struct.Struct("<QQ") # index offset, index length
+RAW = -1 # index rank of a tile stored as its raw pixels
+
+def svd_encode(arr, path, *, tile=64, max_rmse=2.0, factor_dtype=np.float16, processes=None):
+    """
+    compress a 2D arr into a single file at path by cutting it into tile x tile
+    tiles and keeping, for each tile, the smallest rank whose reconstruction
+    has a root mean square error of at most max_rmse (in arr's units, e.g.
+    grey levels). Tiles are decoded independently, see svd_decode.
+
+    Each tile stores U * sqrt(s) and sqrt(s) * VH as factor_dtype, so a rank r
+    tile of t x t pixels costs 2 * t * r values. Where that would take at
+    least as many bytes as the tile itself (noisy tiles past the break even
+    rank t / 2 for same size values) the tile is stored raw, losslessly, and
+    flagged with rank RAW in the index. max_rmse only bounds the truncation
+    error, rounding the factors to factor_dtype adds to it (a little for
+    float16 on 8 bit images).
+
+    Tiles are encoded across a process pool and written as they finish, the
+    tile index goes at the end. Returns a dict of stats (bytes, compression
+    ratio, mean and max rank of the factored tiles, number of raw tiles).
+    Workers split the cores with their BLAS threads, see worker_pool.
+
+    File layout:
+        MAGIC | tile blobs ... | json index | FOOTER (index offset, length)
+    """
+    assert len(arr.shape) == 2, "svd_encode only handles 2D arrays"
+    factor_dtype = np.dtype(factor_dtype)
+    tasks = [
+        (arr[rows, cols], max_rmse, factor_dtype.str)
+        for rows, cols in _tile_slices(arr.shape, tile)
+    ]
+
+    index = []
+    with open(path, "wb") as fh:
+        fh.write(MAGIC)
+        pool = None if processes == 1 else worker_pool(processes, n_tasks=len(tasks))
+        if pool is None:
+            results = map(_encode_tile, tasks)
+        else:
+            results = pool.imap(_encode_tile, tasks, chunksize=16)
+        try:
+            for rank, blob in results:
+                index.append((fh.tell(), rank))
+                fh.write(blob)
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+        index_offset = fh.tell()
+        index_bytes = json.dumps(dict(
+            shape=list(arr.shape),
+            dtype=np.dtype(arr.dtype).str,
+            tile=tile,
+            factor_dtype=factor_dtype.str,
+            tiles=index,
+        )).encode()
+        fh.write(index_bytes)
+        fh.write(FOOTER.pack(index_offset, len(index_bytes)))
+
+    ranks = [rank for _, rank in index if rank != RAW]
+    n_bytes = os.path.getsize(path)
+    return dict(
+        bytes=n_bytes,
+        ratio=arr.size * np.dtype(arr.dtype).itemsize / n_bytes,
+        mean_rank=float(np.mean(ranks)) if ranks else np.nan,
+        max_rank=max(ranks, default=0),
+        raw_tiles=len(index) - len(ranks),
+    )
+
+def svd_decode(path, rows=None, cols=None):
+    """
+    decode arr[rows, cols] from a file written by svd_encode, reading only the
+    tiles that overlap that region. rows and cols are slices (step 1), None
+    decodes the whole image. Integer images are rounded and clipped back to
+    their dtype.
+    """
+    with open(path, "rb") as fh:
+        assert fh.read(len(MAGIC)) == MAGIC, f"{path} is not an svd_encode file"
+        fh.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, index_length = FOOTER.unpack(fh.read(FOOTER.size))
+        fh.seek(index_offset)
+        header = json.loads(fh.read(index_length))
+
+        shape, tile = header["shape"], header["tile"]
+        dtype = np.dtype(header["dtype"])
+        factor_dtype = np.dtype(header["factor_dtype"])
+        rows = range(*(slice(None) if rows is None else rows).indices(shape[0]))
+        cols = range(*(slice(None) if cols is None else cols).indices(shape[1]))
+        assert rows.step == 1 and cols.step == 1, "only contiguous regions are supported"
+
+        out = np.zeros((len(rows), len(cols)))
+        n_tile_cols = -(-shape[1] // tile)
+        for tile_row in range(rows.start // tile, -(-rows.stop // tile)):
+            for tile_col in range(cols.start // tile, -(-cols.stop // tile)):
+                offset, rank = header["tiles"][tile_row * n_tile_cols + tile_col]
+                t_rows = min(tile, shape[0] - tile_row * tile)
+                t_cols = min(tile, shape[1] - tile_col * tile)
+                fh.seek(offset)
+                if rank == RAW:
+                    tile_arr = np.frombuffer(
+                        fh.read(t_rows * t_cols * dtype.itemsize), dtype=dtype,
+                    ).reshape(t_rows, t_cols)
+                else:
+                    UsVH = np.frombuffer(
+                        fh.read(rank * (t_rows + t_cols) * factor_dtype.itemsize), dtype=factor_dtype,
+                    )
+                    Us = UsVH[:rank * t_rows].reshape(t_rows, rank).astype(np.float64)
+                    sVH = UsVH[rank * t_rows:].reshape(rank, t_cols).astype(np.float64)
+                    tile_arr = Us @ sVH
+
+                # overlap of this tile with the requested region, in image coords
+                r0 = max(rows.start, tile_row * tile)
+                r1 = min(rows.stop, tile_row * tile + t_rows)
+                c0 = max(cols.start, tile_col * tile)
+                c1 = min(cols.stop, tile_col * tile + t_cols)
+                out[r0 - rows.start:r1 - rows.start, c0 - cols.start:c1 - cols.start] = (
+                    tile_arr[r0 - tile_row * tile:r1 - tile_row * tile, c0 - tile_col * tile:c1 - tile_col * tile]
+                )
+
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return np.clip(np.rint(out), info.min, info.max).astype(dtype)
+
+    return out.astype(dtype)
+
+def _tile_slices(shape, tile):
+    """
+    (rows, cols) slices of each tile, row major
+    """
+    for row in range(0, shape[0], tile):
+        for col in range(0, shape[1], tile):
+            yield slice(row, row + tile), slice(col, col + tile)
+
+def _encode_tile(task):
+    """
+    pick the smallest rank meeting max_rmse for one tile and pack its factors,
+    or (RAW, the tile's bytes) if those are no bigger
+    """
+    tile_arr, max_rmse, factor_dtype = task
+    factor_dtype = np.dtype(factor_dtype)
+    U, s, VH = arr_svd(np.asarray(tile_arr, dtype=np.float64), compact=True)
+
+    # Eckart-Young: squared error at rank r is the sum of the dropped s**2
+    dropped_sq = np.append(np.cumsum((s**2)[::-1])[::-1], 0)
+    rank = int(np.argmax(dropped_sq <= max_rmse**2 * tile_arr.size))
+    if rank * sum(tile_arr.shape) * factor_dtype.itemsize >= tile_arr.nbytes:
+        return RAW, np.ascontiguousarray(tile_arr).tobytes()
+
+    root_s = np.sqrt(s[:rank])
+    blob = np.concatenate([
+        (U[:, :rank] * root_s).ravel(),
+        (root_s[:, None] * VH[:rank]).ravel(),
+    ]).astype(factor_dtype)
+
+    return rank, blob.tobytes()
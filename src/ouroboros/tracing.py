@@ -0,0 +1,161 @@
+import os, time, json, threading, tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+# opt-in call tracing, see trace_calls. records is None while tracing is off.
+_TRACE_STATE = dict(records=None, memory=False, memory_thread=None, t0=0.0)
+_TRACE_LOCAL = threading.local() # per thread stack of open calls
+
+def traced(func):
+    """
+    decorator recording each call of func (wall and cpu time, input shapes
+    and, optionally, peak traced memory) while a trace_calls block is active.
+    Outside of one the only cost is a dict lookup per call.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if _TRACE_STATE["records"] is None:
+            return func(*args, **kwargs)
+
+        stack = _TRACE_LOCAL.__dict__.setdefault("stack", [])
+        # tracemalloc has a single, process wide peak, so only calls on the
+        # thread that opened the block (not overlapping each other) get one
+        memory = _TRACE_STATE["memory"] and threading.get_ident() == _TRACE_STATE["memory_thread"]
+        frame = dict(start_mem=0, peak=0)
+        if memory:
+            # the peak is reset for each call and the peaks of finished calls
+            # are carried up to their callers
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            frame.update(start_mem=current, peak=current)
+        stack.append(frame)
+
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            stack.pop()
+            record = dict(
+                name=func.__name__,
+                start=wall0 - _TRACE_STATE["t0"],
+                wall=wall,
+                cpu=cpu,
+                depth=len(stack),
+                thread=threading.get_ident(),
+                args=[_describe_arg(arg) for arg in args],
+                kwargs={key: _describe_arg(value) for key, value in kwargs.items() if _describe_arg(value) is not None},
+            )
+            if memory:
+                frame_peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                record["peak_bytes"] = frame_peak - frame["start_mem"]
+                if stack:
+                    stack[-1]["peak"] = max(stack[-1]["peak"], frame_peak)
+                tracemalloc.reset_peak()
+            records = _TRACE_STATE["records"]
+            if records is not None:
+                records.append(record)
+
+    return wrapper
+
+def _describe_arg(value):
+    """
+    "dtype[shape]" for arrays (lists of them for factor tuples), None otherwise
+    """
+    if isinstance(value, np.ndarray):
+        return f"{value.dtype.name}{list(value.shape)}"
+    if isinstance(value, tuple) and value and all(isinstance(item, np.ndarray) for item in value):
+        return [_describe_arg(item) for item in value]
+    return None
+
+@contextmanager
+def trace_calls(path=None, *, memory=False):
+    """
+    record every call to ouroboros' traced functions (the public functions of
+    autodidact_tools and its sibling modules) made inside the with block (by
+    this process) and yield the list the records go into. Each
+    record is a dict with the function name, start (seconds since the block
+    began), wall and cpu time (cpu is process wide, so it includes BLAS
+    threads), nesting depth, thread id and the dtype[shape] of array args.
+
+    ** default params **
+    path -- write the records here on leaving the block, see write_trace
+    memory -- also record peak_bytes, the peak memory traced by tracemalloc
+        during each call above what was allocated when it started (numpy
+        buffers included). Slows numpy-light code down noticeably. Only
+        calls on the thread that opened the block get peak_bytes (which
+        count what other threads allocate meanwhile), calls on worker
+        threads, e.g. stacked_svd's, don't. tracemalloc's peak is reset
+        for every call, so it can't already be running.
+
+    usage:
+        with trace_calls("trace.json", memory=True) as records:
+            hide_message(arr_svd(cover, compact=True), text_arr, 1100)
+        print_trace_summary(records)
+    """
+    assert _TRACE_STATE["records"] is None, "trace_calls blocks can't be nested"
+    if memory and tracemalloc.is_tracing():
+        raise RuntimeError("trace_calls(memory=True) resets tracemalloc's peak, stop your own tracemalloc first")
+    records = []
+    if memory:
+        tracemalloc.start()
+    _TRACE_STATE.update(
+        records=records, memory=memory, memory_thread=threading.get_ident(), t0=time.perf_counter(),
+    )
+    try:
+        yield records
+    finally:
+        _TRACE_STATE.update(records=None, memory=False, memory_thread=None)
+        if memory:
+            tracemalloc.stop()
+        if path is not None:
+            write_trace(records, path)
+
+def write_trace(records, path):
+    """
+    save trace_calls records as a Chrome trace (path ending in .json, open it
+    in chrome://tracing or https://ui.perfetto.dev) or as JSON lines, one
+    record per line, for anything else (e.g. .jsonl)
+    """
+    records = sorted(records, key=lambda record: record["start"])
+    with open(path, "w") as fh:
+        if not path.endswith(".json"):
+            for record in records:
+                fh.write(json.dumps(record) + "\n")
+            return
+        events = [
+            dict(
+                name=record["name"],
+                ph="X", # complete event, nested by time within a thread
+                ts=record["start"] * 1e6,
+                dur=record["wall"] * 1e6,
+                pid=os.getpid(),
+                tid=record["thread"],
+                args={key: record[key] for key in ("cpu", "peak_bytes", "args", "kwargs") if key in record},
+            )
+            for record in records
+        ]
+        json.dump(dict(traceEvents=events, displayTimeUnit="ms"), fh)
+
+def print_trace_summary(records):
+    """
+    table of calls, total wall and cpu time and max peak memory per function,
+    slowest first. Nested calls are counted in their callers' times too.
+    """
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record["name"], dict(calls=0, wall=0.0, cpu=0.0, peak_bytes=None))
+        total["calls"] += 1
+        total["wall"] += record["wall"]
+        total["cpu"] += record["cpu"]
+        if "peak_bytes" in record:
+            total["peak_bytes"] = max(total["peak_bytes"] or 0, record["peak_bytes"])
+
+    print(f"{'function':<24} {'calls':>6} {'wall (s)':>10} {'cpu (s)':>10} {'peak (MB)':>10}")
+    for name, total in sorted(totals.items(), key=lambda item: -item[1]["wall"]):
+        peak = "" if total["peak_bytes"] is None else f"{total['peak_bytes'] / 2**20:.1f}"
+        print(f"{name:<24} {total['calls']:>6} {total['wall']:>10.4f} {total['cpu']:>10.4f} {peak:>10}")
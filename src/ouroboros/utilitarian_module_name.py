@@ -1,5 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
 def hello_world():
     print("hello world")
@@ -15,6 +14,8 @@ def make_nXt(n_neurons, n_spikes=5):
     return neuronsXtime
 
 def some_plot(neuronsXtime):
+    import matplotlib.pyplot as plt # imported here so make_nXt doesn't pay for it
+
     fig, ax = plt.subplots()
     ## vv add plotting code below vv ##
 
@@ -39,6 +40,7 @@ def twoDvectors(
     f_height, f_width = size
 
     if (axes_handle == None):
+        import matplotlib.pyplot as plt
         fig, axes_handle = plt.subplots(figsize=(f_height, f_width))
     else:
         fig = axes_handle.get_figure()